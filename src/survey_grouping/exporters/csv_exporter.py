@@ -4,17 +4,22 @@
 """
 
 import csv
+import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Iterator, List, Optional
 from survey_grouping.models.group import RouteGroup, GroupingResult
 
+logger = logging.getLogger(__name__)
+
 
 class CSVExporter:
     """CSV 匯出器"""
 
     @staticmethod
     def export_groups(
-        groups: List[RouteGroup], output_path: str, include_route_order: bool = True
+        groups: List[RouteGroup],
+        output_path: str | Path,
+        include_route_order: bool = True,
     ) -> bool:
         """匯出分組到 CSV 檔案
 
@@ -30,29 +35,26 @@ class CSVExporter:
             output_file = Path(output_path)
             output_file.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(output_file, "w", newline="", encoding="utf-8-sig") as csvfile:
-                fieldnames = [
-                    "分組編號",
-                    "地址ID",
-                    "完整地址",
-                    "區域",
-                    "村里",
-                    "鄰別",
-                    "街道",
-                    "區段",
-                    "巷",
-                    "弄",
-                    "門牌號",
-                    "經度",
-                    "緯度",
-                ]
-
-                if include_route_order:
-                    fieldnames.append("訪問順序")
-
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-
+            fieldnames = [
+                "分組編號",
+                "地址ID",
+                "完整地址",
+                "區域",
+                "村里",
+                "鄰別",
+                "街道",
+                "區段",
+                "巷",
+                "弄",
+                "門牌號",
+                "經度",
+                "緯度",
+            ]
+
+            if include_route_order:
+                fieldnames.append("訪問順序")
+
+            def iter_rows() -> Iterator[tuple[Any, ...]]:
                 for group in groups:
                     # 建立路線順序對應
                     route_order_map = {}
@@ -61,26 +63,38 @@ class CSVExporter:
                             route_order_map[addr_id] = order
 
                     for addr in group.addresses:
-                        row = {
-                            "分組編號": group.group_id,
-                            "地址ID": addr.id,
-                            "完整地址": addr.full_address,
-                            "區域": addr.district,
-                            "村里": addr.village,
-                            "鄰別": addr.neighborhood,
-                            "街道": addr.street or "",
-                            "區段": addr.area or "",
-                            "巷": addr.lane or "",
-                            "弄": addr.alley or "",
-                            "門牌號": addr.number or "",
-                            "經度": addr.x_coord,
-                            "緯度": addr.y_coord,
-                        }
-
-                        if include_route_order:
-                            row["訪問順序"] = route_order_map.get(addr.id, "")
-
-                        writer.writerow(row)
+                        yield (
+                            group.group_id,
+                            addr.id,
+                            addr.full_address,
+                            addr.district,
+                            addr.village,
+                            addr.neighborhood,
+                            addr.street or "",
+                            addr.area or "",
+                            addr.lane or "",
+                            addr.alley or "",
+                            addr.number or "",
+                            addr.x_coord,
+                            addr.y_coord,
+                            *(
+                                (route_order_map.get(addr.id, ""),)
+                                if include_route_order
+                                else ()
+                            ),
+                        )
+
+            # 直接以 tuple 逐列寫出，並加大寫入緩衝區
+            with open(
+                output_file,
+                "w",
+                newline="",
+                encoding="utf-8-sig",
+                buffering=1 << 20,
+            ) as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(fieldnames)
+                writer.writerows(iter_rows())
 
             return True
 
@@ -89,7 +103,7 @@ class CSVExporter:
             return False
 
     @staticmethod
-    def export_grouping_result(result: GroupingResult, output_path: str) -> bool:
+    def export_grouping_result(result: GroupingResult, output_path: str | Path) -> bool:
         """匯出完整分組結果到 CSV
 
         Args:
@@ -156,7 +170,7 @@ class CSVExporter:
             return False
 
     @staticmethod
-    def export_summary(result: GroupingResult, output_path: str) -> bool:
+    def export_summary(result: GroupingResult, output_path: str | Path) -> bool:
         """匯出分組摘要到 CSV
 
         Args:
@@ -209,7 +223,9 @@ class CSVExporter:
             return False
 
     @staticmethod
-    def export_addresses_only(groups: List[RouteGroup], output_path: str) -> bool:
+    def export_addresses_only(
+        groups: List[RouteGroup], output_path: str | Path
+    ) -> bool:
         """僅匯出地址資訊到 CSV
 
         Args:
@@ -260,7 +276,9 @@ class CSVExporter:
             return False
 
     @staticmethod
-    def create_route_sheets(result: GroupingResult, output_dir: str) -> List[str]:
+    def create_route_sheets(
+        result: GroupingResult, output_dir: str | Path
+    ) -> List[str]:
         """為每個分組建立獨立的路線 CSV 檔案
 
         Args:
@@ -270,56 +288,56 @@ class CSVExporter:
         Returns:
             建立的檔案路徑列表
         """
-        created_files = []
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
 
-        for group in result.groups:
-            filename = f"{group.group_id}_路線.csv"
-            file_path = output_path / filename
-
-            try:
-                with open(file_path, "w", newline="", encoding="utf-8-sig") as csvfile:
-                    fieldnames = [
-                        "訪問順序",
-                        "地址ID",
-                        "完整地址",
-                        "鄰別",
-                        "經度",
-                        "緯度",
-                        "備註",
-                    ]
-
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader()
-
-                    # 按路線順序排序
-                    if group.route_order:
-                        addr_dict = {addr.id: addr for addr in group.addresses}
-                        ordered_addresses = [
-                            addr_dict[addr_id]
-                            for addr_id in group.route_order
-                            if addr_id in addr_dict
-                        ]
-                    else:
-                        ordered_addresses = group.addresses
-
-                    for order, addr in enumerate(ordered_addresses, 1):
-                        row = {
-                            "訪問順序": order,
-                            "地址ID": addr.id,
-                            "完整地址": addr.full_address,
-                            "鄰別": addr.neighborhood,
-                            "經度": addr.x_coord,
-                            "緯度": addr.y_coord,
-                            "備註": "",
-                        }
+        # 依序寫出；分組編號重複時由後者覆寫同一檔案
+        results = [
+            CSVExporter._write_route_sheet(group, output_path)
+            for group in result.groups
+        ]
 
-                        writer.writerow(row)
+        return [file_path for file_path in results if file_path is not None]
+
+    @staticmethod
+    def _write_route_sheet(group: RouteGroup, output_path: Path) -> Optional[str]:
+        """寫出單一分組的路線 CSV 檔案，失敗時回傳 None"""
+        filename = f"{group.group_id}_路線.csv"
+        file_path = output_path / filename
+
+        try:
+            with open(file_path, "w", newline="", encoding="utf-8-sig") as csvfile:
+                fieldnames = [
+                    "訪問順序",
+                    "地址ID",
+                    "完整地址",
+                    "鄰別",
+                    "經度",
+                    "緯度",
+                    "備註",
+                ]
 
-                created_files.append(str(file_path))
+                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                writer.writeheader()
+
+                # 按路線順序排序
+                ordered_addresses = group.get_ordered_addresses()
+
+                for order, addr in enumerate(ordered_addresses, 1):
+                    row = {
+                        "訪問順序": order,
+                        "地址ID": addr.id,
+                        "完整地址": addr.full_address,
+                        "鄰別": addr.neighborhood,
+                        "經度": addr.x_coord,
+                        "緯度": addr.y_coord,
+                        "備註": "",
+                    }
+
+                    writer.writerow(row)
 
-            except Exception as e:
-                print(f"建立路線檔案 {filename} 失敗: {e}")
+            return str(file_path)
 
-        return created_files
+        except Exception:
+            logger.exception("建立路線檔案 %s 失敗", filename)
+            return None
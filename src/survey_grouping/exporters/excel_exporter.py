@@ -13,7 +13,7 @@ class ExcelExporter:
     """Excel 匯出器"""
 
     @staticmethod
-    def export_groups(groups: List[RouteGroup], output_path: str) -> bool:
+    def export_groups(groups: List[RouteGroup], output_path: str | Path) -> bool:
         """匯出分組到 Excel 檔案
 
         Args:
@@ -70,7 +70,7 @@ class ExcelExporter:
 
     @staticmethod
     def export_grouping_result_multi_sheet(
-        result: GroupingResult, output_path: str
+        result: GroupingResult, output_path: str | Path
     ) -> bool:
         """匯出完整分組結果到多工作表 Excel
 
@@ -171,7 +171,7 @@ class ExcelExporter:
             return False
 
     @staticmethod
-    def create_route_workbook(result: GroupingResult, output_path: str) -> bool:
+    def create_route_workbook(result: GroupingResult, output_path: str | Path) -> bool:
         """建立路線工作簿（每個分組一個工作表）
 
         Args:
@@ -207,15 +207,7 @@ class ExcelExporter:
                     sheet_name = f"路線_{group.group_id}"
 
                     # 按路線順序排序
-                    if group.route_order:
-                        addr_dict = {addr.id: addr for addr in group.addresses}
-                        ordered_addresses = [
-                            addr_dict[addr_id]
-                            for addr_id in group.route_order
-                            if addr_id in addr_dict
-                        ]
-                    else:
-                        ordered_addresses = group.addresses
+                    ordered_addresses = group.get_ordered_addresses()
 
                     route_data = []
                     for order, addr in enumerate(ordered_addresses, 1):
@@ -242,7 +234,7 @@ class ExcelExporter:
 
     @staticmethod
     def export_comparison_analysis(
-        results: List[GroupingResult], output_path: str
+        results: List[GroupingResult], output_path: str | Path
     ) -> bool:
         """匯出多個分組結果的比較分析
 
@@ -308,7 +300,7 @@ class ExcelExporter:
             return False
 
     @staticmethod
-    def export_quality_report(result: GroupingResult, output_path: str) -> bool:
+    def export_quality_report(result: GroupingResult, output_path: str | Path) -> bool:
         """匯出品質報告
 
         Args:
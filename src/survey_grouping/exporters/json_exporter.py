@@ -4,17 +4,26 @@
 """
 
 import json
+from collections import Counter
 from pathlib import Path
 from typing import List, Dict, Any
 from datetime import datetime
+from types import ModuleType
 from survey_grouping.models.group import RouteGroup, GroupingResult
 
+# orjson 為選用依賴（pip install survey-route-grouping[speedups]）
+orjson: ModuleType | None
+try:
+    import orjson
+except ImportError:  # 未安裝 orjson 時改用標準函式庫，輸出內容相同
+    orjson = None
+
 
 class JSONExporter:
     """JSON 匯出器"""
 
     @staticmethod
-    def export_groups(groups: List[RouteGroup], output_path: str) -> bool:
+    def export_groups(groups: List[RouteGroup], output_path: str | Path) -> bool:
         """匯出分組到 JSON 檔案
 
         Args:
@@ -60,14 +69,7 @@ class JSONExporter:
                 }
                 groups_data.append(group_data)
 
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(
-                    groups_data,
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                    default=JSONExporter._json_serializer,
-                )
+            JSONExporter._write_json(groups_data, output_file)
 
             return True
 
@@ -76,7 +78,7 @@ class JSONExporter:
             return False
 
     @staticmethod
-    def export_grouping_result(result: GroupingResult, output_path: str) -> bool:
+    def export_grouping_result(result: GroupingResult, output_path: str | Path) -> bool:
         """匯出完整分組結果到 JSON
 
         Args:
@@ -145,14 +147,7 @@ class JSONExporter:
                 "coverage_summary": result.coverage_summary,
             }
 
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(
-                    result_data,
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                    default=JSONExporter._json_serializer,
-                )
+            JSONExporter._write_json(result_data, output_file)
 
             return True
 
@@ -161,7 +156,7 @@ class JSONExporter:
             return False
 
     @staticmethod
-    def export_geojson(groups: List[RouteGroup], output_path: str) -> bool:
+    def export_geojson(groups: List[RouteGroup], output_path: str | Path) -> bool:
         """匯出為 GeoJSON 格式（用於地圖顯示）
 
         Args:
@@ -209,14 +204,7 @@ class JSONExporter:
                 },
             }
 
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(
-                    geojson_data,
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                    default=JSONExporter._json_serializer,
-                )
+            JSONExporter._write_json(geojson_data, output_file)
 
             return True
 
@@ -226,7 +214,7 @@ class JSONExporter:
 
     @staticmethod
     def export_route_optimization_data(
-        groups: List[RouteGroup], output_path: str
+        groups: List[RouteGroup], output_path: str | Path
     ) -> bool:
         """匯出路線優化資料
 
@@ -247,19 +235,8 @@ class JSONExporter:
                 if not group.addresses:
                     continue
 
-                # 建立距離矩陣
                 addresses = group.addresses
-                distance_matrix = []
-
-                for i, addr1 in enumerate(addresses):
-                    row = []
-                    for j, addr2 in enumerate(addresses):
-                        if i == j:
-                            row.append(0.0)
-                        else:
-                            distance = addr1.distance_to(addr2) or 0.0
-                            row.append(round(distance, 2))
-                    distance_matrix.append(row)
+                distance_matrix = group.distance_matrix.round(2).tolist()
 
                 group_route_data = {
                     "group_id": group.group_id,
@@ -280,14 +257,7 @@ class JSONExporter:
 
                 route_data.append(group_route_data)
 
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(
-                    route_data,
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                    default=JSONExporter._json_serializer,
-                )
+            JSONExporter._write_json(route_data, output_file)
 
             return True
 
@@ -296,7 +266,9 @@ class JSONExporter:
             return False
 
     @staticmethod
-    def export_statistics_summary(result: GroupingResult, output_path: str) -> bool:
+    def export_statistics_summary(
+        result: GroupingResult, output_path: str | Path
+    ) -> bool:
         """匯出統計摘要
 
         Args:
@@ -313,15 +285,40 @@ class JSONExporter:
             # 計算詳細統計
             result.calculate_statistics()
 
-            group_sizes = [group.size for group in result.groups]
-            distances = [
-                group.estimated_distance
-                for group in result.groups
-                if group.estimated_distance
-            ]
-            times = [
-                group.estimated_time for group in result.groups if group.estimated_time
-            ]
+            # 單次走訪分組，累計大小分布與距離、時間統計
+            size_counts: Counter[int] = Counter()
+            # 距離為浮點數；沒有距離資料時維持輸出 0
+            distance_count = 0
+            distance_sum: float = 0
+            min_distance: float = 0
+            max_distance: float = 0
+            time_count = time_sum = 0
+            min_time = max_time = 0
+
+            for group in result.groups:
+                size_counts[group.size] += 1
+
+                distance = group.estimated_distance
+                if distance:
+                    if distance_count:
+                        min_distance = min(min_distance, distance)
+                        max_distance = max(max_distance, distance)
+                    else:
+                        min_distance = max_distance = distance
+                    distance_count += 1
+                    distance_sum += distance
+
+                time = group.estimated_time
+                if time:
+                    if time_count:
+                        min_time = min(min_time, time)
+                        max_time = max(max_time, time)
+                    else:
+                        min_time = max_time = time
+                    time_count += 1
+                    time_sum += time
+
+            group_count = len(result.groups)
 
             statistics = {
                 "basic_info": {
@@ -337,53 +334,49 @@ class JSONExporter:
                     "minimum": result.min_group_size,
                     "maximum": result.max_group_size,
                     "distribution": {
-                        str(size): group_sizes.count(size) for size in set(group_sizes)
+                        str(size): size_counts[size] for size in sorted(size_counts)
                     },
                 },
                 "distance_analysis": {
                     "total_distance": result.total_estimated_distance,
                     "average_per_group": (
-                        sum(distances) / len(distances) if distances else 0
+                        distance_sum / distance_count if distance_count else 0
                     ),
-                    "min_distance": min(distances) if distances else 0,
-                    "max_distance": max(distances) if distances else 0,
+                    "min_distance": min_distance,
+                    "max_distance": max_distance,
                 },
                 "time_analysis": {
                     "total_time": result.total_estimated_time,
-                    "average_per_group": sum(times) / len(times) if times else 0,
-                    "min_time": min(times) if times else 0,
-                    "max_time": max(times) if times else 0,
+                    "average_per_group": time_sum / time_count if time_count else 0,
+                    "min_time": min_time,
+                    "max_time": max_time,
                 },
                 "coverage_analysis": result.coverage_summary,
                 "efficiency_metrics": {
                     "addresses_per_group_variance": (
-                        sum((size - result.avg_group_size) ** 2 for size in group_sizes)
-                        / len(group_sizes)
-                        if group_sizes
+                        sum(
+                            count * (size - result.avg_group_size) ** 2
+                            for size, count in size_counts.items()
+                        )
+                        / group_count
+                        if group_count
                         else 0
                     ),
                     "target_achievement_rate": (
                         sum(
-                            1
-                            for size in group_sizes
+                            count
+                            for size, count in size_counts.items()
                             if abs(size - result.target_size) <= 3
                         )
-                        / len(group_sizes)
+                        / group_count
                         * 100
-                        if group_sizes
+                        if group_count
                         else 0
                     ),
                 },
             }
 
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(
-                    statistics,
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                    default=JSONExporter._json_serializer,
-                )
+            JSONExporter._write_json(statistics, output_file)
 
             return True
 
@@ -391,6 +384,30 @@ class JSONExporter:
             print(f"統計摘要匯出失敗: {e}")
             return False
 
+    @staticmethod
+    def _write_json(data: Any, output_file: Path) -> None:
+        """以 UTF-8、縮排 2 格寫出 JSON（有 orjson 時優先使用）"""
+        if orjson is not None:
+            output_file.write_bytes(
+                orjson.dumps(
+                    data,
+                    default=JSONExporter._json_serializer,
+                    option=orjson.OPT_INDENT_2
+                    | orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_SERIALIZE_NUMPY,
+                )
+            )
+            return
+
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(
+                data,
+                f,
+                ensure_ascii=False,
+                indent=2,
+                default=JSONExporter._json_serializer,
+            )
+
     @staticmethod
     def _json_serializer(obj):
         """JSON 序列化輔助函數"""
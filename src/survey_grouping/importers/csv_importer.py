@@ -1,8 +1,8 @@
-import csv
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+import pandas as pd
 from pydantic import BaseModel, Field
 
 from ..models.address import Address
@@ -11,6 +11,7 @@ from ..models.group import RouteGroup, GroupingResult
 
 class CSVGroupRow(BaseModel):
     """CSV 分組資料列模型"""
+
     分組編號: str
     分組大小: Optional[int] = None
     目標大小: Optional[int] = None
@@ -29,124 +30,224 @@ class CSVGroupRow(BaseModel):
         validate_by_name = True
 
 
+# 分組結果 CSV 欄位型別（其餘欄位保留為字串）
+INT_COLUMNS = ("分組大小", "目標大小", "預估時間(分鐘)", "地址ID", "鄰別", "訪問順序")
+FLOAT_COLUMNS = ("預估距離(公尺)", "經度", "緯度")
+COORDINATE_COLUMNS = ("經度", "緯度")
+
+# CSVGroupRow 的必要欄位（CSV 欄名）
+REQUIRED_ROW_COLUMNS = ("分組編號", "完整地址", "區域", "村里", "鄰別", "經度", "緯度")
+
+# CSV 欄名與 CSVGroupRow 屬性名稱不同者
+ROW_FIELD_NAMES = {
+    "預估距離(公尺)": "預估距離_公尺",
+    "預估時間(分鐘)": "預估時間_分鐘",
+}
+
+
+def _parse_cells(values: pd.Series, parse) -> pd.Series:
+    """逐格以 int() 或 float() 解析，無法解析者視為缺值
+
+    只用於向量化轉換失敗的儲存格，保留全形數字、底線分隔等 Python 內建的寫法。
+    """
+
+    def convert(value):
+        try:
+            return parse(value)
+        except ValueError:
+            return None
+
+    return values.map(convert)
+
+
 class CSVImporter:
     """CSV 分組結果導入器"""
-    
+
     def __init__(self):
         self.groups_data: Dict[str, List[CSVGroupRow]] = {}
         self.metadata: Dict[str, any] = {}
-    
-    def read_csv_file(self, file_path: str | Path) -> List[CSVGroupRow]:
-        """讀取 CSV 檔案並解析為 CSVGroupRow 列表"""
-        file_path = Path(file_path)
-        
-        if not file_path.exists():
-            raise FileNotFoundError(f"CSV 檔案不存在: {file_path}")
-        
-        rows = []
-        
+        # 最近一次讀入的 CSV（以路徑、修改時間與大小為鍵），供驗證後的導入重複使用
+        self._frame_cache: Optional[Tuple[tuple, pd.DataFrame]] = None
+
+    def _read_frame(self, file_path: Path) -> pd.DataFrame:
+        """以字串讀入整個 CSV 檔案，檔案未變動時重複使用上次的解析結果"""
+        stat = file_path.stat()
+        cache_key = (file_path.resolve(), stat.st_mtime_ns, stat.st_size)
+        if self._frame_cache is not None and self._frame_cache[0] == cache_key:
+            return self._frame_cache[1].copy()
+
         # 嘗試使用不同編碼讀取檔案
-        encodings = ['utf-8-sig', 'utf-8']
+        encodings = ["utf-8-sig", "utf-8"]
         last_error = None
-        
+
         for encoding in encodings:
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    reader = csv.DictReader(f)
-                    
-                    for row_num, row in enumerate(reader, start=2):  # 從第2行開始計算（第1行是標題）
-                        try:
-                            # 處理可能的空值
-                            processed_row = {}
-                            for key, value in row.items():
-                                if value == '' or value is None:
-                                    processed_row[key] = None
-                                elif key in ['分組大小', '目標大小', '預估時間(分鐘)', '地址ID', '鄰別', '訪問順序']:
-                                    try:
-                                        processed_row[key] = int(value) if value else None
-                                    except ValueError:
-                                        processed_row[key] = None
-                                elif key in ['預估距離(公尺)', '經度', '緯度']:
-                                    try:
-                                        processed_row[key] = float(value) if value else None
-                                    except ValueError:
-                                        if key in ['經度', '緯度']:
-                                            raise ValueError(f"第 {row_num} 行的 {key} 必須是有效數值: {value}")
-                                        processed_row[key] = None
-                                else:
-                                    processed_row[key] = value
-                            
-                            csv_row = CSVGroupRow(**processed_row)
-                            rows.append(csv_row)
-                            
-                        except Exception as e:
-                            raise ValueError(f"解析 CSV 第 {row_num} 行時發生錯誤: {e}")
-                    
-                    # 成功讀取，跳出迴圈
-                    break
-                    
+                # 以記憶體映射讀入，全部先視為字串（只有空字串視為缺值），再整欄轉換型別
+                df = pd.read_csv(
+                    file_path,
+                    dtype=str,
+                    encoding=encoding,
+                    engine="c",
+                    index_col=False,
+                    memory_map=stat.st_size > 0,  # 空檔案無法映射
+                    keep_default_na=False,
+                    na_values=[""],
+                )
+                # 成功讀取，跳出迴圈
+                break
+
+            except pd.errors.EmptyDataError:
+                df = pd.DataFrame(dtype=str)
+                break
             except (UnicodeDecodeError, UnicodeError) as e:
                 last_error = e
                 continue
         else:
             # 所有編碼都失敗
-            raise ValueError(f"無法使用支援的編碼 ({', '.join(encodings)}) 讀取檔案，最後錯誤: {last_error}")
-        
-        return rows
-    
-    def group_rows_by_group_id(self, rows: List[CSVGroupRow]) -> Dict[str, List[CSVGroupRow]]:
+            raise ValueError(
+                f"無法使用支援的編碼 ({', '.join(encodings)}) 讀取檔案，"
+                f"最後錯誤: {last_error}"
+            )
+
+        self._frame_cache = (cache_key, df)
+        return df.copy()
+
+    def read_csv_file(self, file_path: str | Path) -> List[CSVGroupRow]:
+        """讀取 CSV 檔案並解析為 CSVGroupRow 列表"""
+        file_path = Path(file_path)
+
+        if not file_path.exists():
+            raise FileNotFoundError(f"CSV 檔案不存在: {file_path}")
+
+        df = self._read_frame(file_path)
+        if df.empty:
+            return []
+
+        return self._dataframe_to_rows(df)
+
+    def _dataframe_to_rows(self, df: pd.DataFrame) -> List[CSVGroupRow]:
+        """將字串 DataFrame 整欄轉換型別後建立 CSVGroupRow 列表"""
+        # 資料列號從第2行開始計算（第1行是標題）
+        row_nums = df.index + 2
+
+        for key in INT_COLUMNS:
+            if key in df.columns:
+                # ASCII 整數整欄轉換，其餘（如全形數字）逐格以 int() 解析，失敗視為缺值
+                is_int = df[key].str.fullmatch(r"\s*[+-]?[0-9]+\s*", na=False)
+                values = pd.to_numeric(
+                    df[key].where(is_int),
+                    errors="coerce",
+                    dtype_backend="numpy_nullable",
+                ).astype("Int64")
+                rest = df[key].notna() & ~is_int
+                if rest.any():
+                    values[rest] = _parse_cells(df[key][rest], int).astype("Int64")
+                df[key] = values
+
+        for key in FLOAT_COLUMNS:
+            if key in df.columns:
+                # 整數寫法會被轉為整數欄，需明確轉為浮點數
+                values = pd.to_numeric(df[key], errors="coerce").astype(float)
+                rest = values.isna() & df[key].notna()
+                if rest.any():
+                    values[rest] = _parse_cells(df[key][rest], float).astype(float)
+                if key in COORDINATE_COLUMNS:
+                    invalid = (values.isna() & df[key].notna()).to_numpy()
+                    if invalid.any():
+                        pos = invalid.argmax()
+                        raise ValueError(
+                            f"解析 CSV 第 {row_nums[pos]} 行時發生錯誤: "
+                            f"第 {row_nums[pos]} 行的 {key} 必須是有效數值: "
+                            f"{df[key].iloc[pos]}"
+                        )
+                df[key] = values
+
+        # 必要欄位缺漏、為空或格式錯誤時，回報第一個出錯的資料列
+        if len(df):
+            for key in REQUIRED_ROW_COLUMNS:
+                missing = df[key].isna().to_numpy() if key in df.columns else None
+                if missing is None or missing.any():
+                    pos = 0 if missing is None else missing.argmax()
+                    raise ValueError(
+                        f"解析 CSV 第 {row_nums[pos]} 行時發生錯誤: "
+                        f"{key} 欄位缺漏或格式錯誤"
+                    )
+
+        # 欄位型別已確定，略過逐列 pydantic 驗證
+        columns = [
+            key
+            for key in df.columns
+            if ROW_FIELD_NAMES.get(key, key) in CSVGroupRow.model_fields
+        ]
+        records = df[columns].astype(object).where(df[columns].notna(), None)
+        records.columns = [ROW_FIELD_NAMES.get(key, key) for key in columns]
+
+        return [
+            CSVGroupRow.model_construct(**record)
+            for record in records.to_dict("records")
+        ]
+
+    def group_rows_by_group_id(
+        self, rows: List[CSVGroupRow]
+    ) -> Dict[str, List[CSVGroupRow]]:
         """將 CSV 資料按分組編號分組"""
         groups = {}
-        
+
         for row in rows:
             group_id = row.分組編號
             if group_id not in groups:
                 groups[group_id] = []
             groups[group_id].append(row)
-        
+
         return groups
-    
-    def convert_to_route_groups(self, grouped_rows: Dict[str, List[CSVGroupRow]]) -> List[RouteGroup]:
+
+    def convert_to_route_groups(
+        self, grouped_rows: Dict[str, List[CSVGroupRow]]
+    ) -> List[RouteGroup]:
         """將分組的 CSV 資料轉換為 RouteGroup 物件"""
         route_groups = []
-        
+
         for group_id, rows in grouped_rows.items():
             if not rows:
                 continue
-            
-            # 轉換地址
-            addresses = []
-            route_order = []
-            
-            for row in rows:
-                # 生成地址 ID（如果沒有提供的話）
-                addr_id = row.地址ID if row.地址ID is not None else hash(row.完整地址) % 1000000
-                
-                address = Address(
+
+            # 生成地址 ID（如果沒有提供的話）
+            addr_ids = [
+                row.地址ID if row.地址ID is not None else hash(row.完整地址) % 1000000
+                for row in rows
+            ]
+
+            # 轉換地址（欄位型別已於讀取時確認，略過 pydantic 驗證）
+            addresses = [
+                Address.model_construct(
                     id=addr_id,
                     district=row.區域,
                     village=row.村里,
                     neighborhood=row.鄰別,
                     full_address=row.完整地址,
                     x_coord=row.經度,
-                    y_coord=row.緯度
+                    y_coord=row.緯度,
                 )
-                addresses.append(address)
-                
-                # 建立路線順序（如果有提供的話）
-                if row.訪問順序 is not None:
-                    route_order.append((row.訪問順序, addr_id))
-            
+                for row, addr_id in zip(rows, addr_ids)
+            ]
+
+            # 建立路線順序（如果有提供的話）
+            route_order = [
+                (row.訪問順序, addr_id)
+                for row, addr_id in zip(rows, addr_ids)
+                if row.訪問順序 is not None
+            ]
+
             # 按訪問順序排序
             if route_order:
                 route_order.sort(key=lambda x: x[0])  # 按順序編號排序
                 sorted_route_order = [addr_id for _, addr_id in route_order]
             else:
                 sorted_route_order = []
-            
+
             # 取得分組統計資訊（從第一筆資料）
             first_row = rows[0]
-            
+
             route_group = RouteGroup(
                 group_id=group_id,
                 addresses=addresses,
@@ -155,33 +256,33 @@ class CSVImporter:
                 route_order=sorted_route_order,
                 target_size=first_row.目標大小,
                 actual_size=first_row.分組大小 or len(addresses),
-                created_at=datetime.now()
+                created_at=datetime.now(),
             )
-            
+
             route_groups.append(route_group)
-        
+
         return route_groups
-    
+
     def import_from_csv(self, file_path: str | Path) -> GroupingResult:
         """從 CSV 檔案導入完整的分組結果"""
         # 1. 讀取 CSV 檔案
         rows = self.read_csv_file(file_path)
-        
+
         if not rows:
             raise ValueError("CSV 檔案為空或無有效資料")
-        
+
         # 2. 按分組編號分組
         grouped_rows = self.group_rows_by_group_id(rows)
-        
+
         # 3. 轉換為 RouteGroup 物件
         route_groups = self.convert_to_route_groups(grouped_rows)
-        
+
         # 4. 從第一筆資料取得基本資訊
         first_row = rows[0]
         district = first_row.區域
         village = first_row.村里
         target_size = first_row.目標大小 or 35  # 預設值
-        
+
         # 5. 建立 GroupingResult
         grouping_result = GroupingResult(
             district=district,
@@ -190,129 +291,105 @@ class CSVImporter:
             total_addresses=len(rows),
             total_groups=len(route_groups),
             groups=route_groups,
-            created_at=datetime.now()
+            created_at=datetime.now(),
         )
-        
+
         # 6. 計算統計資訊
         grouping_result.calculate_statistics()
-        
+
         return grouping_result
-    
-    def validate_csv_format(self, file_path: str | Path, for_addresses_only: bool = False) -> Tuple[bool, List[str]]:
+
+    def validate_csv_format(
+        self, file_path: str | Path, for_addresses_only: bool = False
+    ) -> Tuple[bool, List[str]]:
         """驗證 CSV 檔案格式
-        
+
         Args:
             file_path: CSV 檔案路徑
             for_addresses_only: 如果為 True，只檢查地址相關欄位（不需要分組編號）
         """
         file_path = Path(file_path)
         errors = []
-        
+
         if not file_path.exists():
             return False, [f"檔案不存在: {file_path}"]
-        
-        # 嘗試使用不同編碼讀取檔案
-        encodings = ['utf-8-sig', 'utf-8']
-        last_error = None
-        
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    reader = csv.DictReader(f)
-                    headers = reader.fieldnames
-                    
-                    # 檢查必要欄位
-                    if for_addresses_only:
-                        # 只檢查地址相關欄位
-                        required_fields = ['完整地址', '區域', '村里', '鄰別', '經度', '緯度']
-                    else:
-                        # 檢查分組結果相關欄位
-                        required_fields = ['分組編號', '完整地址', '區域', '村里', '鄰別', '經度', '緯度']
-                    
-                    missing_fields = [field for field in required_fields if field not in headers]
-                    
-                    if missing_fields:
-                        errors.append(f"缺少必要欄位: {', '.join(missing_fields)}")
-                    
-                    # 檢查前幾筆資料的格式
-                    sample_count = 0
-                    for row_num, row in enumerate(reader, start=2):
-                        if sample_count >= 5:  # 只檢查前5筆
-                            break
-                        
-                        # 檢查經緯度是否為有效數值
-                        try:
-                            float(row['經度'])
-                            float(row['緯度'])
-                        except (ValueError, KeyError):
-                            errors.append(f"第 {row_num} 行的經緯度格式錯誤")
-                        
-                        # 檢查鄰別是否為整數
-                        try:
-                            int(row['鄰別'])
-                        except (ValueError, KeyError):
-                            errors.append(f"第 {row_num} 行的鄰別必須是整數")
-                        
-                        sample_count += 1
-                
-                # 成功讀取，跳出迴圈
-                break
-                
-            except (UnicodeDecodeError, UnicodeError) as e:
-                last_error = e
-                continue
+
+        try:
+            df = self._read_frame(file_path)
+        except ValueError as e:
+            return False, [str(e)]
+
+        headers = list(df.columns)
+
+        # 檢查必要欄位
+        if for_addresses_only:
+            # 只檢查地址相關欄位
+            required_fields = ["完整地址", "區域", "村里", "鄰別", "經度", "緯度"]
         else:
-            # 所有編碼都失敗
-            errors.append(f"無法使用支援的編碼 ({', '.join(encodings)}) 讀取檔案，最後錯誤: {last_error}")
-        
+            # 檢查分組結果相關欄位
+            required_fields = [
+                "分組編號",
+                "完整地址",
+                "區域",
+                "村里",
+                "鄰別",
+                "經度",
+                "緯度",
+            ]
+
+        missing_fields = [field for field in required_fields if field not in headers]
+
+        if missing_fields:
+            errors.append(f"缺少必要欄位: {', '.join(missing_fields)}")
+
+        # 檢查前幾筆資料的格式（只檢查前5筆）
+        sample_rows = df.head(5).fillna("").to_dict("records")
+        for row_num, row in enumerate(sample_rows, start=2):
+            # 檢查經緯度是否為有效數值
+            try:
+                float(row["經度"])
+                float(row["緯度"])
+            except (ValueError, KeyError):
+                errors.append(f"第 {row_num} 行的經緯度格式錯誤")
+
+            # 檢查鄰別是否為整數
+            try:
+                int(row["鄰別"])
+            except (ValueError, KeyError):
+                errors.append(f"第 {row_num} 行的鄰別必須是整數")
+
         return len(errors) == 0, errors
-    
+
     def import_addresses_from_csv(self, file_path: str | Path) -> List[Address]:
         """從 CSV 檔案讀取地址資料並轉換為 Address 物件列表"""
         file_path = Path(file_path)
-        
+
         if not file_path.exists():
             raise FileNotFoundError(f"CSV 檔案不存在: {file_path}")
-        
+
         addresses = []
-        
-        # 嘗試使用不同編碼讀取檔案
-        encodings = ['utf-8-sig', 'utf-8']
-        last_error = None
-        
-        for encoding in encodings:
+        df = self._read_frame(file_path).fillna("")
+
+        for row_num, row in enumerate(
+            df.to_dict("records"), start=2
+        ):  # 從第2行開始計算（第1行是標題）
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    reader = csv.DictReader(f)
-                    
-                    for row_num, row in enumerate(reader, start=2):  # 從第2行開始計算（第1行是標題）
-                        try:
-                            # 建立 Address 物件
-                            # 生成地址 ID（使用地址內容的哈希值）
-                            addr_id = hash(row['完整地址']) % 1000000
-                            
-                            address = Address(
-                                id=addr_id,
-                                district=row['區域'],
-                                village=row['村里'],
-                                neighborhood=int(row['鄰別']),
-                                full_address=row['完整地址'],
-                                x_coord=float(row['經度']),
-                                y_coord=float(row['緯度'])
-                            )
-                            addresses.append(address)
-                            
-                        except Exception as e:
-                            raise ValueError(f"解析 CSV 第 {row_num} 行時發生錯誤: {e}")
-                    
-                    # 成功讀取，跳出迴圈
-                    break
-                    
-            except (UnicodeDecodeError, UnicodeError) as e:
-                last_error = e
-                continue
-        else:
-            # 所有編碼都失敗
-            raise ValueError(f"無法使用支援的編碼 ({', '.join(encodings)}) 讀取檔案，最後錯誤: {last_error}")
-        
-        return addresses
\ No newline at end of file
+                # 建立 Address 物件
+                # 生成地址 ID（使用地址內容的哈希值）
+                addr_id = hash(row["完整地址"]) % 1000000
+
+                address = Address(
+                    id=addr_id,
+                    district=row["區域"],
+                    village=row["村里"],
+                    neighborhood=int(row["鄰別"]),
+                    full_address=row["完整地址"],
+                    x_coord=float(row["經度"]),
+                    y_coord=float(row["緯度"]),
+                )
+                addresses.append(address)
+
+            except Exception as e:
+                raise ValueError(f"解析 CSV 第 {row_num} 行時發生錯誤: {e}")
+
+        return addresses
@@ -3,6 +3,8 @@ from enum import Enum
 
 from pydantic import BaseModel, Field
 
+from ..utils.constants import EARTH_RADIUS_M
+
 
 class AddressType(str, Enum):
     STREET = "street"
@@ -72,7 +74,4 @@ class Address(BaseModel):
         )
         c = 2 * math.asin(math.sqrt(a))
 
-        # 地球半徑（公尺）
-        r = 6371000
-
-        return c * r
+        return c * EARTH_RADIUS_M
@@ -1,10 +1,83 @@
+from collections import Counter
 from datetime import datetime
+from typing import NamedTuple
 
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, PrivateAttr
 
+from ..utils.constants import EARTH_RADIUS_M
 from .address import Address
 
 
+def _coordinate_arrays(addresses: list[Address]) -> tuple[np.ndarray, np.ndarray]:
+    """取得地址的緯度、經度陣列（無有效座標者為 NaN）"""
+    lats = np.full(len(addresses), np.nan)
+    lons = np.full(len(addresses), np.nan)
+    for i, addr in enumerate(addresses):
+        if addr.has_valid_coordinates:
+            lons[i], lats[i] = addr.x_coord, addr.y_coord
+    return lats, lons
+
+
+def _summary_key(addresses: list[Address]) -> tuple:
+    """取得地址統計所依據的內容；地址被替換或修改座標、鄰別時會不同"""
+    return tuple(
+        (addr.id, addr.x_coord, addr.y_coord, addr.neighborhood) for addr in addresses
+    )
+
+
+def _haversine(
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    lat2: np.ndarray,
+    lon2: np.ndarray,
+) -> np.ndarray:
+    """向量化計算兩組座標間的直線距離（公尺），任一端缺座標時為 NaN"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def _pairwise_haversine(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """計算依序相鄰兩點間的直線距離（公尺）"""
+    return _haversine(lats[:-1], lons[:-1], lats[1:], lons[1:])
+
+
+class _AddressSummary(NamedTuple):
+    """分組地址的統計快取"""
+
+    key: tuple  # 計算時各地址的 (id, 經度, 緯度, 鄰別)，用來判斷快取是否過期
+    lats: np.ndarray  # 依地址順序的緯度（缺座標為 NaN）
+    lons: np.ndarray  # 依地址順序的經度（缺座標為 NaN）
+    index_by_id: dict[int, int]
+    valid_count: int  # 有效座標的地址數
+    center: tuple[float, float] | None
+    coverage: tuple[float, float, float, float] | None
+    neighborhood_counts: Counter
+
+
+class _DerivedCache:
+    """分組衍生資料（地址統計、距離矩陣）的快取容器
+
+    內容完全由地址推導而來，因此不參與模型相等比較；
+    快取中含 NumPy 陣列，若直接比較會引發 ValueError。
+    """
+
+    __slots__ = ("summary", "distance_matrix")
+
+    def __init__(self):
+        self.summary: _AddressSummary | None = None
+        self.distance_matrix: np.ndarray | None = None
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _DerivedCache)
+
+    __hash__ = None
+
+
 class RouteGroup(BaseModel):
     """路線分組模型"""
 
@@ -26,80 +99,147 @@ class RouteGroup(BaseModel):
         None  # (min_lat, min_lng, max_lat, max_lng)
     )
 
+    _cache: _DerivedCache = PrivateAttr(default_factory=_DerivedCache)
+
     @property
     def size(self) -> int:
         """取得分組大小"""
         return len(self.addresses)
 
+    def _build_address_summary(self, key: tuple) -> _AddressSummary:
+        """將地址轉為座標陣列，並計算中心點、覆蓋範圍與鄰別統計"""
+        lats, lons = _coordinate_arrays(self.addresses)
+        valid = ~np.isnan(lats)
+        center = coverage = None
+        if valid.any():
+            valid_lats, valid_lons = lats[valid], lons[valid]
+            center = (float(valid_lons.mean()), float(valid_lats.mean()))
+            coverage = (
+                float(valid_lats.min()),
+                float(valid_lons.min()),
+                float(valid_lats.max()),
+                float(valid_lons.max()),
+            )
+
+        return _AddressSummary(
+            key=key,
+            lats=lats,
+            lons=lons,
+            index_by_id={addr.id: i for i, addr in enumerate(self.addresses)},
+            valid_count=int(np.count_nonzero(valid)),
+            center=center,
+            coverage=coverage,
+            neighborhood_counts=Counter(addr.neighborhood for addr in self.addresses),
+        )
+
+    def _get_address_summary(self) -> _AddressSummary:
+        """取得地址統計，地址增減、替換或座標、鄰別變動時重新計算"""
+        cache = self._cache
+        summary = cache.summary
+        key = _summary_key(self.addresses)
+        if summary is None or summary.key != key:
+            summary = cache.summary = self._build_address_summary(key)
+            cache.distance_matrix = None
+        return summary
+
+    @property
+    def distance_matrix(self) -> np.ndarray:
+        """地址間的直線距離矩陣（公尺），順序與 addresses 相同"""
+        summary = self._get_address_summary()
+        cache = self._cache
+        if cache.distance_matrix is None:
+            lats, lons = summary.lats, summary.lons
+            matrix = _haversine(
+                lats[:, None], lons[:, None], lats[None, :], lons[None, :]
+            )
+            # 缺座標的地址距離視為 0
+            matrix = np.nan_to_num(matrix, nan=0.0)
+            np.fill_diagonal(matrix, 0.0)
+            matrix.flags.writeable = False
+            cache.distance_matrix = matrix
+        return cache.distance_matrix
+
     @property
     def center_coordinates(self) -> tuple[float, float] | None:
         """計算分組的地理中心點"""
-        valid_coords = [
-            addr.coordinates for addr in self.addresses if addr.has_valid_coordinates
-        ]
-        if not valid_coords:
-            return None
-
-        avg_x = sum(coord[0] for coord in valid_coords) / len(valid_coords)
-        avg_y = sum(coord[1] for coord in valid_coords) / len(valid_coords)
-        return (avg_x, avg_y)
+        return self._get_address_summary().center
 
     @property
     def address_count_by_neighborhood(self) -> dict:
         """按鄰別統計地址數量"""
-        neighborhood_count = {}
-        for addr in self.addresses:
-            neighborhood = addr.neighborhood
-            neighborhood_count[neighborhood] = (
-                neighborhood_count.get(neighborhood, 0) + 1
-            )
-        return neighborhood_count
+        return dict(self._get_address_summary().neighborhood_counts)
 
     @property
     def coverage_area(self) -> tuple[float, float, float, float] | None:
         """計算分組覆蓋的地理範圍 (min_lat, min_lng, max_lat, max_lng)"""
-        valid_coords = [
-            addr.coordinates for addr in self.addresses if addr.has_valid_coordinates
-        ]
-        if not valid_coords:
-            return None
-
-        lngs = [coord[0] for coord in valid_coords]
-        lats = [coord[1] for coord in valid_coords]
-
-        return (min(lats), min(lngs), max(lats), max(lngs))
+        return self._get_address_summary().coverage
 
     def get_addresses_by_neighborhood(self, neighborhood: int) -> list[Address]:
         """取得指定鄰別的地址"""
         return [addr for addr in self.addresses if addr.neighborhood == neighborhood]
 
+    def get_route_stops(self) -> list[tuple[int, Address]]:
+        """依路線順序取得 (訪問順序, 地址) 列表
+
+        訪問順序為 route_order 中的位置（從 1 起算），略過不存在的 id；
+        沒有路線順序時回傳空列表。
+        """
+        index_by_id = self._get_address_summary().index_by_id
+        addresses = self.addresses
+        return [
+            (order, addresses[index_by_id[addr_id]])
+            for order, addr_id in enumerate(self.route_order, 1)
+            if addr_id in index_by_id
+        ]
+
+    def get_ordered_addresses(self) -> list[Address]:
+        """依路線順序取得地址（略過不存在的 id），沒有路線順序時回傳原順序"""
+        if not self.route_order:
+            return self.addresses
+
+        return [addr for _, addr in self.get_route_stops()]
+
+    def get_route_coordinates(self) -> np.ndarray:
+        """依路線順序取得有效座標的 (N, 2) 唯讀陣列，欄位為 (lat, lng)
+
+        順序與 get_ordered_addresses 相同，並略過無有效座標的地址。
+        """
+        summary = self._get_address_summary()
+        coords: np.ndarray = np.column_stack((summary.lats, summary.lons))
+        if self.route_order:
+            index_by_id = summary.index_by_id
+            indices = np.fromiter(
+                (index_by_id.get(addr_id, -1) for addr_id in self.route_order),
+                dtype=np.intp,
+                count=len(self.route_order),
+            )
+            coords = coords[indices[indices >= 0]]
+        coords = coords[~np.isnan(coords[:, 0])]
+        coords.flags.writeable = False
+        return coords
+
     def calculate_route_distance(self) -> float:
         """計算路線總距離（簡化版本）"""
         if len(self.addresses) < 2:
             return 0.0
 
-        total_distance = 0.0
+        summary = self._get_address_summary()
+        lats, lons = summary.lats, summary.lons
         if self.route_order:
-            # 按照路線順序計算
-            ordered_addresses = []
-            addr_dict = {addr.id: addr for addr in self.addresses}
-
-            for addr_id in self.route_order:
-                if addr_id in addr_dict:
-                    ordered_addresses.append(addr_dict[addr_id])
-
-            for i in range(len(ordered_addresses) - 1):
-                distance = ordered_addresses[i].distance_to(ordered_addresses[i + 1])
-                if distance:
-                    total_distance += distance
-        else:
-            # 簡單的相鄰距離計算
-            for i in range(len(self.addresses) - 1):
-                distance = self.addresses[i].distance_to(self.addresses[i + 1])
-                if distance:
-                    total_distance += distance
-
-        return total_distance
+            # 按照路線順序取出座標
+            index_by_id = summary.index_by_id
+            positions = [
+                index_by_id[addr_id]
+                for addr_id in self.route_order
+                if addr_id in index_by_id
+            ]
+            lats, lons = lats[positions], lons[positions]
+
+        if len(lats) < 2:
+            return 0.0
+
+        # 缺座標的路段（NaN）不計入
+        return float(np.nansum(_pairwise_haversine(lats, lons)))
 
     def optimize_route_order(self) -> list[int]:
         """簡化的路線優化（最近鄰演算法）"""
@@ -107,24 +247,41 @@ class RouteGroup(BaseModel):
             return [addr.id for addr in self.addresses]
 
         # 找到最南邊的點作為起點
-        start_addr = min(
-            self.addresses,
-            key=lambda addr: addr.y_coord if addr.y_coord else float("inf"),
+        addresses = self.addresses
+        start = min(
+            range(len(addresses)),
+            key=lambda i: (
+                addresses[i].y_coord if addresses[i].y_coord else float("inf")
+            ),
         )
+        start_addr = addresses[start]
 
-        unvisited = [addr for addr in self.addresses if addr.id != start_addr.id]
-        route = [start_addr.id]
-        current = start_addr
+        summary = self._get_address_summary()
+        # 弧度與緯度餘弦只需計算一次
+        lat_rad, lon_rad = np.radians(summary.lats), np.radians(summary.lons)
+        cos_lat = np.cos(lat_rad)
 
-        while unvisited:
-            # 找到最近的未訪問地址
-            nearest = min(
-                unvisited,
-                key=lambda addr: current.distance_to(addr) or float("inf"),
+        unvisited = np.array(
+            [i for i, addr in enumerate(addresses) if addr.id != start_addr.id],
+            dtype=np.intp,
+        )
+        route = [start_addr.id]
+        current = start
+
+        while len(unvisited):
+            # 找到最近的未訪問地址（距離為 0 或缺座標者視為最遠）
+            a = (
+                np.sin((lat_rad[unvisited] - lat_rad[current]) / 2) ** 2
+                + cos_lat[current]
+                * cos_lat[unvisited]
+                * np.sin((lon_rad[unvisited] - lon_rad[current]) / 2) ** 2
             )
-            route.append(nearest.id)
-            unvisited.remove(nearest)
-            current = nearest
+            distances = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+            distances[~(distances > 0)] = np.inf
+            nearest = int(np.argmin(distances))
+            current = int(unvisited[nearest])
+            route.append(addresses[current].id)
+            unvisited = np.delete(unvisited, nearest)
 
         return route
 
@@ -146,6 +303,37 @@ class RouteGroup(BaseModel):
         }
 
 
+def combined_extent(
+    groups: list[RouteGroup],
+) -> tuple[tuple[float, float] | None, tuple[float, float, float, float] | None]:
+    """合併各分組快取的中心點與覆蓋範圍
+
+    中心點以各分組有效座標數加權平均，不再重新走訪所有地址。
+
+    Returns:
+        ((lat, lng), (min_lat, min_lng, max_lat, max_lng))，無有效座標時為 (None, None)
+    """
+    summaries = [
+        summary
+        for summary in (group._get_address_summary() for group in groups)
+        if summary.valid_count
+    ]
+    if not summaries:
+        return None, None
+
+    weights = np.array([summary.valid_count for summary in summaries], dtype=float)
+    centers = np.array([summary.center for summary in summaries])  # (lng, lat)
+    coverages = np.array([summary.coverage for summary in summaries])
+
+    avg_lng, avg_lat = weights @ centers / weights.sum()
+    min_lat, min_lng = coverages[:, :2].min(axis=0)
+    max_lat, max_lng = coverages[:, 2:].max(axis=0)
+    return (
+        (float(avg_lat), float(avg_lng)),
+        (float(min_lat), float(min_lng), float(max_lat), float(max_lng)),
+    )
+
+
 class GroupingResult(BaseModel):
     """分組結果模型"""
 
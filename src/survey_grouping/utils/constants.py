@@ -0,0 +1,4 @@
+"""共用常數"""
+
+# 地球半徑（公尺），直線距離（haversine）計算皆使用此值
+EARTH_RADIUS_M = 6371000
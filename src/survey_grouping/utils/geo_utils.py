@@ -77,15 +77,23 @@ class PostGISQueries:
         limit: int = 50,
         max_distance: float = 1000.0,
     ) -> str:
-        """生成最近鄰查詢 SQL"""
+        """生成最近鄰查詢 SQL
+
+        以 geography 型別計算距離，ST_DWithin 的門檻直接使用公尺，
+        可搭配 ``CREATE INDEX ON addresses USING GIST ((geom::geography));``
+        索引；排序仍以 geometry 的 ``<->`` KNN 運算子進行。
+        """
         return f"""
         SELECT *, 
-               ST_Distance(geom, ST_SetSRID(ST_Point({lon}, {lat}), 4326)) as distance_meters
+               ST_Distance(
+                   geom::geography,
+                   ST_SetSRID(ST_Point({lon}, {lat}), 4326)::geography
+               ) as distance_meters
         FROM addresses 
         WHERE ST_DWithin(
-            geom, 
-            ST_SetSRID(ST_Point({lon}, {lat}), 4326), 
-            {max_distance/111320}  -- 轉換為度數近似值
+            geom::geography, 
+            ST_SetSRID(ST_Point({lon}, {lat}), 4326)::geography, 
+            {max_distance}
         )
         ORDER BY geom <-> ST_SetSRID(ST_Point({lon}, {lat}), 4326)
         LIMIT {limit};
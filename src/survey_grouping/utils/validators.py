@@ -3,9 +3,13 @@
 提供地址、座標、分組等資料的驗證功能。
 """
 
+import math
 import re
+from collections import Counter, defaultdict
+from functools import lru_cache
 from typing import List, Optional, Tuple, Union
 from survey_grouping.models.address import Address, AddressType
+from survey_grouping.utils.constants import EARTH_RADIUS_M
 
 
 class AddressValidator:
@@ -32,34 +36,54 @@ class AddressValidator:
         Returns:
             (是否有效, 錯誤訊息列表)
         """
+        is_valid, errors = cls._validate_address_fields(
+            address.district,
+            address.village,
+            address.neighborhood,
+            address.x_coord,
+            address.y_coord,
+            address.full_address,
+        )
+        return is_valid, list(errors)
+
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _validate_address_fields(
+        cls,
+        district: str,
+        village: str,
+        neighborhood: Optional[int],
+        x_coord: Optional[float],
+        y_coord: Optional[float],
+        full_address: str,
+    ) -> Tuple[bool, Tuple[str, ...]]:
+        """依欄位值驗證地址（結果依欄位快取，相同內容的地址只驗證一次）"""
         errors = []
 
         # 檢查必要欄位
-        if not address.district:
+        if not district:
             errors.append("缺少區域資訊")
-        elif not cls._validate_district(address.district):
-            errors.append(f"區域格式不正確: {address.district}")
+        elif not cls._validate_district(district):
+            errors.append(f"區域格式不正確: {district}")
 
-        if not address.village:
+        if not village:
             errors.append("缺少村里資訊")
-        elif not cls._validate_village(address.village):
-            errors.append(f"村里格式不正確: {address.village}")
+        elif not cls._validate_village(village):
+            errors.append(f"村里格式不正確: {village}")
 
-        if address.neighborhood is None or address.neighborhood < 1:
+        if neighborhood is None or neighborhood < 1:
             errors.append("鄰別資訊無效")
 
         # 檢查座標
-        coord_valid, coord_errors = cls.validate_coordinates(
-            address.x_coord, address.y_coord
-        )
+        coord_valid, coord_errors = cls.validate_coordinates(x_coord, y_coord)
         if not coord_valid:
             errors.extend(coord_errors)
 
         # 檢查完整地址
-        if not address.full_address or len(address.full_address.strip()) < 5:
+        if not full_address or len(full_address.strip()) < 5:
             errors.append("完整地址過短或為空")
 
-        return len(errors) == 0, errors
+        return len(errors) == 0, tuple(errors)
 
     @classmethod
     def validate_coordinates(
@@ -101,14 +125,14 @@ class AddressValidator:
         """驗證區域名稱"""
         if not district:
             return False
-        return bool(re.match(cls.TAIWAN_ADDRESS_PATTERNS["district"], district))
+        return bool(_DISTRICT_RE.match(district))
 
     @classmethod
     def _validate_village(cls, village: str) -> bool:
         """驗證村里名稱"""
         if not village:
             return False
-        return bool(re.match(cls.TAIWAN_ADDRESS_PATTERNS["village"], village))
+        return bool(_VILLAGE_RE.match(village))
 
     @classmethod
     def validate_address_list(cls, addresses: List[Address]) -> dict:
@@ -149,6 +173,15 @@ class AddressValidator:
         }
 
 
+# 預先編譯的正則表達式，避免每次驗證都查詢 re 模組的快取
+_DISTRICT_RE = re.compile(AddressValidator.TAIWAN_ADDRESS_PATTERNS["district"])
+_VILLAGE_RE = re.compile(AddressValidator.TAIWAN_ADDRESS_PATTERNS["village"])
+_FORMAT_DISTRICT_RE = re.compile(r"[\u4e00-\u9fff]+[區市鎮鄉]")
+_FORMAT_VILLAGE_RE = re.compile(r"[\u4e00-\u9fff]+[里村]")
+_FORMAT_NUMBER_RE = re.compile(r"\d+號?")
+_SPACED_DIGITS_RE = re.compile(r"\d+\s+\d+")
+
+
 class GroupingValidator:
     """分組驗證器"""
 
@@ -223,12 +256,7 @@ class GroupingValidator:
         Returns:
             鄰別分布統計
         """
-        neighborhood_count = {}
-        for addr in addresses:
-            neighborhood = addr.neighborhood
-            neighborhood_count[neighborhood] = (
-                neighborhood_count.get(neighborhood, 0) + 1
-            )
+        neighborhood_count = dict(Counter(addr.neighborhood for addr in addresses))
 
         total_neighborhoods = len(neighborhood_count)
         max_in_neighborhood = (
@@ -265,17 +293,25 @@ class DataQualityValidator:
 
         total = len(addresses)
         completeness = {
-            "has_coordinates": sum(
-                1 for addr in addresses if addr.has_valid_coordinates
-            ),
-            "has_full_address": sum(1 for addr in addresses if addr.full_address),
-            "has_street": sum(1 for addr in addresses if addr.street),
-            "has_area": sum(1 for addr in addresses if addr.area),
-            "has_lane": sum(1 for addr in addresses if addr.lane),
-            "has_alley": sum(1 for addr in addresses if addr.alley),
-            "has_number": sum(1 for addr in addresses if addr.number),
+            "has_coordinates": 0,
+            "has_full_address": 0,
+            "has_street": 0,
+            "has_area": 0,
+            "has_lane": 0,
+            "has_alley": 0,
+            "has_number": 0,
         }
 
+        # 單次走訪累計所有欄位
+        for addr in addresses:
+            completeness["has_coordinates"] += addr.has_valid_coordinates
+            completeness["has_full_address"] += bool(addr.full_address)
+            completeness["has_street"] += bool(addr.street)
+            completeness["has_area"] += bool(addr.area)
+            completeness["has_lane"] += bool(addr.lane)
+            completeness["has_alley"] += bool(addr.alley)
+            completeness["has_number"] += bool(addr.number)
+
         # 計算百分比
         percentages = {
             key: round(count / total * 100, 2) for key, count in completeness.items()
@@ -300,36 +336,16 @@ class DataQualityValidator:
         Returns:
             重複檢測結果
         """
-        # 按完整地址檢測重複
-        address_groups = {}
-        for addr in addresses:
-            key = addr.full_address.strip().lower()
-            if key not in address_groups:
-                address_groups[key] = []
+        # 按完整地址檢測重複（正規化鍵值只計算一次）
+        keys = [addr.full_address.strip().lower() for addr in addresses]
+        address_groups = defaultdict(list)
+        for key, addr in zip(keys, addresses):
             address_groups[key].append(addr.id)
 
         duplicates = {key: ids for key, ids in address_groups.items() if len(ids) > 1}
 
         # 按座標檢測重複（容忍 10 公尺誤差）
-        coordinate_duplicates = []
-        processed = set()
-
-        for i, addr1 in enumerate(addresses):
-            if i in processed or not addr1.has_valid_coordinates:
-                continue
-
-            similar_addresses = [addr1.id]
-            for j, addr2 in enumerate(addresses[i + 1 :], i + 1):
-                if not addr2.has_valid_coordinates:
-                    continue
-
-                distance = addr1.distance_to(addr2) or float("inf")
-                if distance < 10:  # 10 公尺內視為重複
-                    similar_addresses.append(addr2.id)
-                    processed.add(j)
-
-            if len(similar_addresses) > 1:
-                coordinate_duplicates.append(similar_addresses)
+        coordinate_duplicates = cls._find_coordinate_clusters(addresses, 10.0)
 
         return {
             "address_duplicates": duplicates,
@@ -337,6 +353,75 @@ class DataQualityValidator:
             "total_duplicate_groups": len(duplicates) + len(coordinate_duplicates),
         }
 
+    @classmethod
+    def _find_coordinate_clusters(
+        cls, addresses: List[Address], threshold: float
+    ) -> List[List[int]]:
+        """找出座標相距小於門檻的地址群組
+
+        以網格索引篩選候選配對，再用併查集 (union-find) 合併，
+        可正確處理遞移關係（A~B、B~C 則 A、B、C 同群）。
+
+        Args:
+            addresses: 地址列表
+            threshold: 距離門檻（公尺）
+
+        Returns:
+            每個群組的地址 ID 列表（僅包含兩個以上地址的群組）
+        """
+        # 只保留有座標的地址，並先取出 (經度, 緯度) 供網格計算
+        located = [
+            (i, addr, coords)
+            for i, addr in enumerate(addresses)
+            if (coords := addr.coordinates) is not None
+        ]
+        if len(located) < 2:
+            return []
+
+        parent = list(range(len(addresses)))
+        rank = [0] * len(addresses)
+
+        def find(i: int) -> int:
+            root = i
+            while parent[root] != root:
+                root = parent[root]
+            while parent[i] != root:
+                parent[i], i = root, parent[i]
+            return root
+
+        def union(i: int, j: int) -> None:
+            root_i, root_j = find(i), find(j)
+            if root_i == root_j:
+                return
+            if rank[root_i] < rank[root_j]:
+                root_i, root_j = root_j, root_i
+            parent[root_j] = root_i
+            if rank[root_i] == rank[root_j]:
+                rank[root_i] += 1
+
+        # 網格邊長至少為門檻距離，只需比對相鄰 3x3 格；
+        # 以與 distance_to 相同的地球半徑換算角度，並略為放大以涵蓋邊界上的距離
+        max_lat = max(abs(lat) for _, _, (_, lat) in located)
+        cell_lat = math.degrees(threshold / EARTH_RADIUS_M) * 1.001
+        cell_lng = cell_lat / max(math.cos(math.radians(max_lat)), 1e-6)
+
+        grid: defaultdict[tuple[int, int], list[int]] = defaultdict(list)
+        for i, addr, (lng, lat) in located:
+            cell = (math.floor(lat / cell_lat), math.floor(lng / cell_lng))
+            for d_row in (-1, 0, 1):
+                for d_col in (-1, 0, 1):
+                    for j in grid.get((cell[0] + d_row, cell[1] + d_col), ()):
+                        distance = addr.distance_to(addresses[j])
+                        if distance is not None and distance < threshold:
+                            union(i, j)
+            grid[cell].append(i)
+
+        components: defaultdict[int, list[int]] = defaultdict(list)
+        for i, addr, _ in located:
+            components[find(i)].append(addr.id)
+
+        return [ids for ids in components.values() if len(ids) > 1]
+
     @classmethod
     def validate_address_format(cls, address_string: str) -> Tuple[bool, List[str]]:
         """驗證地址字串格式
@@ -354,29 +439,30 @@ class DataQualityValidator:
         address = address_string.strip()
 
         # 檢查是否包含基本元素
-        if not re.search(r"[\u4e00-\u9fff]+[區市鎮鄉]", address):
+        if not _FORMAT_DISTRICT_RE.search(address):
             suggestions.append("缺少區域資訊（如：○○區）")
 
-        if not re.search(r"[\u4e00-\u9fff]+[里村]", address):
+        if not _FORMAT_VILLAGE_RE.search(address):
             suggestions.append("缺少村里資訊（如：○○里）")
 
-        if not re.search(r"\d+號?", address):
+        if not _FORMAT_NUMBER_RE.search(address):
             suggestions.append("缺少門牌號碼")
 
         # 檢查常見錯誤
         if "巷弄" in address:
             suggestions.append("'巷弄' 應分開寫成 '巷' 和 '弄'")
 
-        if re.search(r"\d+\s+\d+", address):
+        if _SPACED_DIGITS_RE.search(address):
             suggestions.append("數字間不應有空格")
 
         return len(suggestions) == 0, suggestions
 
 
+@lru_cache(maxsize=1024, typed=True)
 def validate_input_parameters(
     district: str, village: str, target_size: int
-) -> Tuple[bool, List[str]]:
-    """驗證輸入參數
+) -> Tuple[bool, Tuple[str, ...]]:
+    """驗證輸入參數（結果會快取，錯誤訊息以 tuple 回傳避免被修改）
 
     Args:
         district: 區域名稱
@@ -384,7 +470,7 @@ def validate_input_parameters(
         target_size: 目標分組大小
 
     Returns:
-        (是否有效, 錯誤訊息列表)
+        (是否有效, 錯誤訊息)
     """
     errors = []
 
@@ -408,4 +494,4 @@ def validate_input_parameters(
     elif target_size < 5:
         errors.append("目標分組大小過小（建議至少 5 個）")
 
-    return len(errors) == 0, errors
+    return len(errors) == 0, tuple(errors)
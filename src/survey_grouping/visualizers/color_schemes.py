@@ -3,9 +3,13 @@
 提供地圖視覺化的顏色方案和配置。
 """
 
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 import colorsys
 
+# 預先產生的顏色數量，超過時才在呼叫時補算
+_PRECOMPUTED_COLORS = 256
+
 
 class ColorScheme:
     """顏色配置類別"""
@@ -85,26 +89,14 @@ class ColorScheme:
         Returns:
             顏色代碼列表
         """
-        if num_colors <= len(cls.DISTINCT_COLORS):
-            return cls.DISTINCT_COLORS[:num_colors]
-        
-        # 如果需要更多顏色，使用 HSV 色彩空間生成
-        colors = cls.DISTINCT_COLORS.copy()
-        
-        for i in range(len(cls.DISTINCT_COLORS), num_colors):
-            # 使用黃金角度分割來生成均勻分布的色相
-            hue = (i * 137.508) % 360  # 黃金角度 ≈ 137.508°
-            saturation = 0.7 + (i % 3) * 0.1  # 0.7, 0.8, 0.9
-            value = 0.8 + (i % 2) * 0.1  # 0.8, 0.9
-            
-            rgb = colorsys.hsv_to_rgb(hue / 360, saturation, value)
-            hex_color = "#{:02x}{:02x}{:02x}".format(
-                int(rgb[0] * 255),
-                int(rgb[1] * 255),
-                int(rgb[2] * 255)
-            )
-            colors.append(hex_color)
+        if num_colors <= len(_GENERATED_COLORS):
+            return list(_GENERATED_COLORS[:num_colors])
         
+        # 超出預先產生的範圍時才逐一計算
+        colors = list(_GENERATED_COLORS)
+        colors.extend(
+            _hsv_color(i) for i in range(len(_GENERATED_COLORS), num_colors)
+        )
         return colors
 
     @classmethod
@@ -117,12 +109,13 @@ class ColorScheme:
         Returns:
             包含各種顏色配置的字典
         """
+        fill_colors = cls.generate_colors(num_groups)
         return {
-            "fill_colors": cls.generate_colors(num_groups),
+            "fill_colors": fill_colors,
             "marker_colors": [
                 cls.get_marker_color(i) for i in range(num_groups)
             ],
-            "line_colors": cls.generate_colors(num_groups),
+            "line_colors": fill_colors.copy(),
         }
 
     @classmethod
@@ -136,10 +129,7 @@ class ColorScheme:
         Returns:
             RGBA 顏色字串
         """
-        base_color = cls.get_group_color(group_index)
-        # 將 hex 轉換為 RGB
-        hex_color = base_color.lstrip('#')
-        rgb = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        rgb = _hex_to_rgb(cls.get_group_color(group_index))
         
         return f"rgba({rgb[0]}, {rgb[1]}, {rgb[2]}, {alpha})"
 
@@ -150,11 +140,41 @@ class ColorScheme:
         Returns:
             CSS 樣式字典
         """
-        return {
-            "background-color": "white",
-            "border": "2px solid grey",
-            "border-radius": "5px",
-            "padding": "10px",
-            "font-size": "14px",
-            "font-family": "Arial, sans-serif",
-        }
+        return dict(_LEGEND_STYLE)
+
+
+def _hsv_color(index: int) -> str:
+    """以黃金角度分割色相，產生第 index 個顏色"""
+    hue = (index * 137.508) % 360  # 黃金角度 ≈ 137.508°
+    saturation = 0.7 + (index % 3) * 0.1  # 0.7, 0.8, 0.9
+    value = 0.8 + (index % 2) * 0.1  # 0.8, 0.9
+
+    rgb = colorsys.hsv_to_rgb(hue / 360, saturation, value)
+    return "#{:02x}{:02x}{:02x}".format(
+        int(rgb[0] * 255),
+        int(rgb[1] * 255),
+        int(rgb[2] * 255)
+    )
+
+
+@lru_cache(maxsize=None)
+def _hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    """將 #RRGGBB 轉換為 RGB 整數三元組"""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+# 預定義顏色之後接上 HSV 產生的顏色，載入模組時一次算好
+_GENERATED_COLORS: Tuple[str, ...] = tuple(ColorScheme.DISTINCT_COLORS) + tuple(
+    _hsv_color(i)
+    for i in range(len(ColorScheme.DISTINCT_COLORS), _PRECOMPUTED_COLORS)
+)
+
+_LEGEND_STYLE: Dict[str, str] = {
+    "background-color": "white",
+    "border": "2px solid grey",
+    "border-radius": "5px",
+    "padding": "10px",
+    "font-size": "14px",
+    "font-family": "Arial, sans-serif",
+}
@@ -3,21 +3,219 @@
 使用 Folium 生成互動式地圖的核心渲染器。
 """
 
-from typing import List, Dict, Any, Optional, Tuple
-import folium
-from folium import plugins
-import branca.colormap as cm
+from __future__ import annotations
 
-from ..models.group import RouteGroup
+from functools import lru_cache
+from types import ModuleType
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple, cast
+import numpy as np
+
+from ..models.group import RouteGroup, combined_extent
 from ..models.address import Address
 from .color_schemes import ColorScheme
 
+if TYPE_CHECKING:
+    import folium
+    from branca.element import Figure
+    from folium import Map
+
+# 總覽地圖低於此縮放層級時隱藏地址標記（並停用點擊與提示）
+MARKER_MIN_ZOOM = 14
+
+# 分組地圖共用的 HTML 片段（以 str.format 填入內容，避免每次重建樣式）
+_GROUP_TITLE_HTML = """
+        <h3 align="center" style="font-size:18px">
+            <b>{group_id} 詳細路線</b><br>
+            <span style="font-size:14px">
+                {size} 個地址 | 
+                預估距離: {distance:.0f}m | 
+                預估時間: {time} 分鐘
+            </span>
+        </h3>
+        """
+
+_GROUP_STATS_HEADER_HTML = """
+        <div style="
+            position: fixed;
+            top: 10px;
+            right: 10px;
+            width: 200px;
+            background: white;
+            border: 2px solid #ccc;
+            border-radius: 5px;
+            padding: 10px;
+            font-family: Arial, sans-serif;
+            font-size: 12px;
+            z-index: 9999;
+        ">
+            <h4 style="margin: 0 0 10px 0;">分組統計</h4>
+            <p><strong>地址數量:</strong> {size} 個</p>
+            <p><strong>預估距離:</strong> {distance:.0f} 公尺</p>
+            <p><strong>預估時間:</strong> {time} 分鐘</p>
+            <p><strong>鄰別分布:</strong></p>
+            <ul style="margin: 5px 0; padding-left: 20px;">
+        """
+
+_GROUP_STATS_FOOTER_HTML = """
+            </ul>
+        </div>
+        """
+
+_LEGEND_HEADER_HTML = """
+        <div style="
+            position: fixed;
+            bottom: 50px;
+            left: 10px;
+            width: 200px;
+            background: white;
+            border: 2px solid #ccc;
+            border-radius: 5px;
+            padding: 10px;
+            font-family: Arial, sans-serif;
+            font-size: 12px;
+            z-index: 9999;
+        ">
+            <h4 style="margin: 0 0 10px 0;">圖例</h4>
+        """
+
+_LEGEND_ITEM_HTML = """
+            <p style="margin: 5px 0;">
+                <span style="
+                    display: inline-block;
+                    width: 15px;
+                    height: 15px;
+                    background-color: {color};
+                    border: 1px solid #000;
+                    margin-right: 5px;
+                "></span>
+                {group_id} ({size}個)
+            </p>
+            """
+
+# 標記彈出視窗與順序圖示
+# 彈出視窗樣式以 class 集中定義，每張地圖只輸出一次
+_POPUP_CSS = (
+    "<style>"
+    ".pp{width:220px}.pp h4{margin:0 0 6px}.pp p{margin:4px 0}"
+    "</style>"
+)
+
+_GROUP_POPUP_HTML = (
+    '<div class="pp"><h4>{group_id}</h4>'
+    "<p><b>地址:</b> {addr.full_address}</p>"
+    "<p><b>鄰別:</b> {addr.neighborhood}鄰</p>"
+    "<p><b>座標:</b> {addr.y_coord:.6f}, {addr.x_coord:.6f}</p></div>"
+)
+
+_ORDERED_POPUP_HTML = (
+    '<div class="pp"><h4>訪問順序: {order}</h4>'
+    "<p><b>地址:</b> {addr.full_address}</p>"
+    "<p><b>鄰別:</b> {addr.neighborhood}鄰</p>"
+    "<p><b>座標:</b> {addr.y_coord:.6f}, {addr.x_coord:.6f}</p></div>"
+)
+
+_ORDER_ICON_HTML = (
+    '<div style="background-color:{color};border:2px solid white;'
+    "border-radius:50%;width:30px;height:30px;display:flex;"
+    "align-items:center;justify-content:center;font-weight:bold;"
+    "font-size:14px;color:white;"
+    'text-shadow:1px 1px 1px rgba(0,0,0,0.5)">{order}</div>'
+)
+
+
+def _route_coords(group: RouteGroup) -> Optional[np.ndarray]:
+    """依路線順序取得有效座標的 (N, 2) 陣列，欄位為 (lat, lng)
+
+    沒有路線順序或不足兩個點而無法連線時回傳 None。
+    """
+    if not group.route_order:
+        return None
+
+    coords = group.get_route_coordinates()
+    return coords if len(coords) >= 2 else None
+
+
+@lru_cache(maxsize=None)
+def _load_folium() -> ModuleType:
+    """延遲載入 folium（含 folium.plugins）並回傳模組
+
+    folium 於實際繪製地圖時才載入，只需摘要統計的呼叫端與測試收集
+    不必付出 HTML 相關套件的匯入成本。
+    """
+    import folium
+    import folium.plugins
+
+    return folium
+
+
+@lru_cache(maxsize=None)
+def _marker_zoom_toggle_class() -> type:
+    """建立 _MarkerZoomToggle 類別（繪製地圖時才匯入 branca）"""
+    from branca.element import MacroElement
+    from jinja2 import Template
+
+    class _MarkerZoomToggle(MacroElement):
+        """依縮放層級切換 CircleMarker 顯示與互動的 Leaflet 腳本"""
+
+        _template = Template(
+            """
+            {% macro script(this, kwargs) %}
+            (function () {
+                var map = {{ this._parent.get_name() }};
+                function toggleMarkers() {
+                    var visible = map.getZoom() >= {{ this.min_zoom }};
+                    map.eachLayer(function (layer) {
+                        if (layer instanceof L.CircleMarker) {
+                            layer.setStyle({
+                                opacity: visible ? 1 : 0,
+                                fillOpacity: visible ? 0.8 : 0
+                            });
+                            // 隱藏的標記不可點擊或顯示提示（canvas 依 interactive、
+                            // SVG 依 pointer-events 判斷）
+                            layer.options.interactive = visible;
+                            var el = layer.getElement && layer.getElement();
+                            if (el) {
+                                el.style.pointerEvents = visible ? "" : "none";
+                            }
+                            if (!visible) {
+                                layer.closePopup();
+                                layer.closeTooltip();
+                            }
+                        }
+                    });
+                }
+                map.on("zoomend", toggleMarkers);
+                map.whenReady(toggleMarkers);
+            })();
+            {% endmacro %}
+            """
+        )
+
+        def __init__(self, min_zoom: int):
+            super().__init__()
+            self._name = "MarkerZoomToggle"
+            self.min_zoom = min_zoom
+
+    return _MarkerZoomToggle
+
 
 class FoliumRenderer:
     """Folium 地圖渲染器"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        tiles: str = "OpenStreetMap",
+        tiles_attr: Optional[str] = None,
+    ):
+        """初始化渲染器
+
+        Args:
+            tiles: 底圖圖磚名稱或 URL 樣板（如較輕量的 "CartoDB positron"）
+            tiles_attr: 自訂圖磚 URL 時必須提供的版權標示
+        """
         self.color_scheme = ColorScheme()
+        self.tiles = tiles
+        self.tiles_attr = tiles_attr
 
     def create_overview_map(
         self,
@@ -37,15 +235,19 @@ class FoliumRenderer:
         Returns:
             Folium 地圖物件
         """
+        folium = _load_folium()
+
         # 計算地圖中心點
         if not center_coords:
             center_coords = self._calculate_center(groups)
 
         # 建立地圖
-        m = folium.Map(
+        m: Map = folium.Map(
             location=center_coords,
             zoom_start=15,
-            tiles="OpenStreetMap",
+            tiles=self.tiles,
+            attr=self.tiles_attr,
+            prefer_canvas=True,
         )
 
         # 添加標題
@@ -67,16 +269,18 @@ class FoliumRenderer:
             # 添加標記
             self._add_group_markers(fg, group, i)
             
-            # 添加路線
-            if len(group.addresses) > 1:
-                self._add_route_line(fg, group, i)
-            
             feature_groups[group.group_id] = fg
             m.add_child(fg)
 
+        # 所有分組路線合併為單一圖層
+        self._add_route_lines(m, groups)
+
         # 添加圖層控制
         folium.LayerControl().add_to(m)
 
+        # 縮小至門檻以下時隱藏地址標記
+        _marker_zoom_toggle_class()(MARKER_MIN_ZOOM).add_to(m)
+
         # 添加統計資訊
         self._add_statistics_panel(m, groups, district, village)
 
@@ -103,27 +307,27 @@ class FoliumRenderer:
         Returns:
             Folium 地圖物件
         """
+        folium = _load_folium()
+
         # 計算地圖中心點
         center_coords = self._calculate_group_center(group)
 
         # 建立地圖
-        m = folium.Map(
+        m: Map = folium.Map(
             location=center_coords,
             zoom_start=16,
-            tiles="OpenStreetMap",
+            tiles=self.tiles,
+            attr=self.tiles_attr,
+            prefer_canvas=True,
         )
 
         # 添加標題
-        title_html = f"""
-        <h3 align="center" style="font-size:18px">
-            <b>{group.group_id} 詳細路線</b><br>
-            <span style="font-size:14px">
-                {group.size} 個地址 | 
-                預估距離: {group.estimated_distance or 0:.0f}m | 
-                預估時間: {group.estimated_time or 0} 分鐘
-            </span>
-        </h3>
-        """
+        title_html = _GROUP_TITLE_HTML.format(
+            group_id=group.group_id,
+            size=group.size,
+            distance=group.estimated_distance or 0,
+            time=group.estimated_time or 0,
+        )
         m.get_root().html.add_child(folium.Element(title_html))
 
         # 添加標記（帶訪問順序）
@@ -140,34 +344,19 @@ class FoliumRenderer:
 
     def _calculate_center(self, groups: List[RouteGroup]) -> Tuple[float, float]:
         """計算所有分組的地理中心點"""
-        all_coords = []
-        for group in groups:
-            for addr in group.addresses:
-                if addr.has_valid_coordinates:
-                    all_coords.append((addr.y_coord, addr.x_coord))  # (lat, lng)
-
-        if not all_coords:
+        center, _ = combined_extent(groups)
+        if center is None:
             return (23.0, 120.0)  # 台灣中心點
 
-        avg_lat = sum(coord[0] for coord in all_coords) / len(all_coords)
-        avg_lng = sum(coord[1] for coord in all_coords) / len(all_coords)
-        
-        return (avg_lat, avg_lng)
+        return center
 
     def _calculate_group_center(self, group: RouteGroup) -> Tuple[float, float]:
         """計算單一分組的地理中心點"""
-        valid_coords = [
-            (addr.y_coord, addr.x_coord)
-            for addr in group.addresses
-            if addr.has_valid_coordinates
-        ]
-
-        if not valid_coords:
+        center = group.center_coordinates
+        if center is None:
             return (23.0, 120.0)
 
-        avg_lat = sum(coord[0] for coord in valid_coords) / len(valid_coords)
-        avg_lng = sum(coord[1] for coord in valid_coords) / len(valid_coords)
-        
+        avg_lng, avg_lat = center
         return (avg_lat, avg_lng)
 
     def _add_group_markers(
@@ -176,62 +365,90 @@ class FoliumRenderer:
         group: RouteGroup, 
         group_index: int
     ):
-        """添加分組標記"""
-        marker_color = self.color_scheme.get_marker_color(group_index)
-        
-        for addr in group.addresses:
-            if not addr.has_valid_coordinates:
-                continue
+        """添加分組標記
 
-            # 建立彈出視窗內容
-            popup_html = f"""
-            <div style="width: 200px;">
-                <h4>{group.group_id}</h4>
-                <p><strong>地址:</strong> {addr.full_address}</p>
-                <p><strong>鄰別:</strong> {addr.neighborhood}鄰</p>
-                <p><strong>座標:</strong> {addr.y_coord:.6f}, {addr.x_coord:.6f}</p>
-            </div>
-            """
+        所有地址以單一 GeoJSON 圖層輸出，由 Leaflet 以 CircleMarker 繪製，
+        避免逐一建立 Marker 物件與 DOM 元素。
+        """
+        folium = _load_folium()
+
+        color = self.color_scheme.get_group_color(group_index)
+
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [addr.x_coord, addr.y_coord],
+                },
+                "properties": {
+                    "group_id": group.group_id,
+                    "full_address": addr.full_address,
+                    "neighborhood": f"{addr.neighborhood}鄰",
+                    "coordinates": f"{addr.y_coord:.6f}, {addr.x_coord:.6f}",
+                },
+            }
+            for addr in group.addresses
+            if addr.has_valid_coordinates
+        ]
+        if not features:
+            return
 
-            folium.Marker(
-                location=[addr.y_coord, addr.x_coord],
-                popup=folium.Popup(popup_html, max_width=250),
-                tooltip=addr.full_address,
-                icon=folium.Icon(color=marker_color, icon="home"),
-            ).add_to(feature_group)
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": features},
+            # 樣式直接設在 CircleMarker 上：同組樣式固定，不使用 style_function，
+            # 省去 folium 逐一要素 json.dumps 建立樣式對照表
+            marker=folium.CircleMarker(
+                radius=5,
+                color=color,
+                weight=1,
+                fill=True,
+                fill_color=color,
+                fill_opacity=0.8,
+            ),
+            popup=folium.GeoJsonPopup(
+                fields=["group_id", "full_address", "neighborhood", "coordinates"],
+                aliases=["分組", "地址", "鄰別", "座標"],
+            ),
+            tooltip=folium.GeoJsonTooltip(fields=["full_address"], labels=False),
+            control=False,
+        ).add_to(feature_group)
+
+    def _ordered_stops(self, group: RouteGroup) -> List[Tuple[int, Address]]:
+        """依路線順序取得 (訪問順序, 地址) 列表
+
+        訪問順序沿用 route_order 中的位置（與匯出檔的「訪問順序」一致），
+        並略過不存在或無有效座標的地址。
+        """
+        return [
+            (order, addr)
+            for order, addr in group.get_route_stops()
+            if addr.has_valid_coordinates
+        ]
 
     def _add_ordered_markers(
         self, 
         map_obj: folium.Map, 
         group: RouteGroup, 
-        group_index: int
+        group_index: int,
     ):
         """添加帶訪問順序的標記"""
+        folium = _load_folium()
+
         # 如果沒有路線順序，使用一般標記
         if not group.route_order:
             self._add_group_markers_to_map(map_obj, group, group_index)
             return
-            
-        marker_color = self.color_scheme.get_marker_color(group_index)
-        
-        # 建立地址字典
-        addr_dict = {addr.id: addr for addr in group.addresses}
-        
-        # 按路線順序添加標記
-        for order, addr_id in enumerate(group.route_order, 1):
-            addr = addr_dict.get(addr_id)
-            if not addr or not addr.has_valid_coordinates:
-                continue
 
+        stops = self._ordered_stops(group)
+
+        self._add_popup_css(map_obj)
+        color = self.color_scheme.get_group_color(group_index)
+
+        # 按路線順序添加標記
+        for order, addr in stops:
             # 建立彈出視窗內容
-            popup_html = f"""
-            <div style="width: 220px;">
-                <h4>訪問順序: {order}</h4>
-                <p><strong>地址:</strong> {addr.full_address}</p>
-                <p><strong>鄰別:</strong> {addr.neighborhood}鄰</p>
-                <p><strong>座標:</strong> {addr.y_coord:.6f}, {addr.x_coord:.6f}</p>
-            </div>
-            """
+            popup_html = _ORDERED_POPUP_HTML.format(order=order, addr=addr)
 
             # 使用 DivIcon 顯示順序編號
             folium.Marker(
@@ -239,132 +456,126 @@ class FoliumRenderer:
                 popup=folium.Popup(popup_html, max_width=250),
                 tooltip=f"{order}. {addr.full_address}",
                 icon=folium.DivIcon(
-                    html=f"""
-                    <div style="
-                        background-color: {self.color_scheme.get_group_color(group_index)};
-                        border: 2px solid white;
-                        border-radius: 50%;
-                        width: 30px;
-                        height: 30px;
-                        display: flex;
-                        align-items: center;
-                        justify-content: center;
-                        font-weight: bold;
-                        font-size: 14px;
-                        color: white;
-                        text-shadow: 1px 1px 1px rgba(0,0,0,0.5);
-                    ">{order}</div>
-                    """,
+                    html=_ORDER_ICON_HTML.format(color=color, order=order),
                     icon_size=(30, 30),
                     icon_anchor=(15, 15),
                 ),
             ).add_to(map_obj)
     
+    def _add_popup_css(self, map_obj: folium.Map):
+        """添加標記彈出視窗共用樣式"""
+        folium = _load_folium()
+        root = cast("Figure", map_obj.get_root())
+        root.header.add_child(folium.Element(_POPUP_CSS))
+
     def _add_group_markers_to_map(
         self, 
         map_obj: folium.Map, 
         group: RouteGroup, 
         group_index: int
     ):
-        """直接在地圖上添加一般分組標記（無順序）"""
-        marker_color = self.color_scheme.get_marker_color(group_index)
-        
+        """直接在地圖上添加一般分組標記（無順序）
+
+        以 CircleMarker 繪製（prefer_canvas 下由 canvas 渲染），
+        不需載入圖示並建立 DOM 元素。
+        """
+        folium = _load_folium()
+
+        color = self.color_scheme.get_group_color(group_index)
+        self._add_popup_css(map_obj)
+
         for addr in group.addresses:
             if not addr.has_valid_coordinates:
                 continue
 
             # 建立彈出視窗內容
-            popup_html = f"""
-            <div style="width: 200px;">
-                <h4>{group.group_id}</h4>
-                <p><strong>地址:</strong> {addr.full_address}</p>
-                <p><strong>鄰別:</strong> {addr.neighborhood}鄰</p>
-                <p><strong>座標:</strong> {addr.y_coord:.6f}, {addr.x_coord:.6f}</p>
-            </div>
-            """
+            popup_html = _GROUP_POPUP_HTML.format(
+                group_id=group.group_id, addr=addr
+            )
 
-            folium.Marker(
+            folium.CircleMarker(
                 location=[addr.y_coord, addr.x_coord],
+                radius=5,
+                color=color,
+                fill=True,
+                fill_color=color,
+                fill_opacity=0.8,
                 popup=folium.Popup(popup_html, max_width=250),
                 tooltip=addr.full_address,
-                icon=folium.Icon(color=marker_color, icon="home"),
             ).add_to(map_obj)
 
-    def _add_route_line(
-        self, 
-        feature_group: folium.FeatureGroup, 
-        group: RouteGroup, 
-        group_index: int
-    ):
-        """添加路線連線"""
-        # 如果沒有路線順序，不繪製路線
-        if not group.route_order or len(group.addresses) < 2:
-            return
+    def _add_route_lines(self, map_obj: folium.Map, groups: List[RouteGroup]):
+        """以單一 GeoJSON 圖層添加所有分組的路線連線"""
+        folium = _load_folium()
 
-        # 建立地址字典
-        addr_dict = {addr.id: addr for addr in group.addresses}
-        
-        # 按路線順序建立座標列表
-        route_coords = []
-        
-        for addr_id in group.route_order:
-            addr = addr_dict.get(addr_id)
-            if addr and addr.has_valid_coordinates:
-                route_coords.append([addr.y_coord, addr.x_coord])
+        features = []
+        for i, group in enumerate(groups):
+            # 如果沒有路線順序，不繪製路線
+            route_coords = _route_coords(group)
+            if route_coords is None:
+                continue
 
-        if len(route_coords) < 2:
+            # GeoJSON 座標為 (lng, lat)
+            coords = route_coords[:, ::-1].tolist()
+
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "LineString", "coordinates": coords},
+                    "properties": {
+                        "group_id": group.group_id,
+                        "color": self.color_scheme.get_group_color(i),
+                    },
+                }
+            )
+
+        if not features:
             return
 
-        # 添加路線
-        folium.PolyLine(
-            locations=route_coords,
-            color=self.color_scheme.get_group_color(group_index),
-            weight=3,
-            opacity=0.8,
-            popup=f"{group.group_id} 路線",
-        ).add_to(feature_group)
+        fg = folium.FeatureGroup(name="路線")
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": features},
+            style_function=lambda feature: {
+                "color": feature["properties"]["color"],
+                "weight": 3,
+                "opacity": 0.8,
+            },
+            tooltip=folium.GeoJsonTooltip(fields=["group_id"], labels=False),
+        ).add_to(fg)
+        map_obj.add_child(fg)
 
     def _add_detailed_route(
         self, 
         map_obj: folium.Map, 
         group: RouteGroup, 
-        group_index: int
+        group_index: int,
     ):
         """添加詳細路線（帶箭頭）"""
-        # 如果沒有路線順序，不繪製路線
-        if not group.route_order or len(group.addresses) < 2:
-            return
-
-        # 建立地址字典
-        addr_dict = {addr.id: addr for addr in group.addresses}
-        
-        # 按路線順序建立座標列表
-        route_coords = []
-        
-        for addr_id in group.route_order:
-            addr = addr_dict.get(addr_id)
-            if addr and addr.has_valid_coordinates:
-                route_coords.append([addr.y_coord, addr.x_coord])
+        folium = _load_folium()
 
-        if len(route_coords) < 2:
+        # 按路線順序建立座標列表，沒有路線順序時不繪製路線
+        route_coords = _route_coords(group)
+        if route_coords is None:
             return
 
+        color = self.color_scheme.get_group_color(group_index)
+
         # 添加路線
-        folium.PolyLine(
-            locations=route_coords,
-            color=self.color_scheme.get_group_color(group_index),
+        route_line = folium.PolyLine(
+            locations=route_coords.tolist(),
+            color=color,
             weight=4,
             opacity=0.9,
         ).add_to(map_obj)
 
-        # 添加方向箭頭
-        plugins.PolyLineTextPath(
-            folium.PolyLine(route_coords, weight=0),
+        # 添加方向箭頭（直接掛在路線上，不另建隱形折線）
+        folium.plugins.PolyLineTextPath(
+            route_line,
             "►",
             repeat=True,
             offset=7,
             attributes={
-                "fill": self.color_scheme.get_group_color(group_index),
+                "fill": color,
                 "font-weight": "bold",
                 "font-size": "20",
             },
@@ -378,6 +589,8 @@ class FoliumRenderer:
         village: str
     ):
         """添加統計資訊面板"""
+        folium = _load_folium()
+
         total_addresses = sum(group.size for group in groups)
         total_distance = sum(
             group.estimated_distance or 0 for group in groups
@@ -411,75 +624,41 @@ class FoliumRenderer:
 
     def _add_group_statistics(self, map_obj: folium.Map, group: RouteGroup):
         """添加分組統計資訊"""
+        folium = _load_folium()
+
         neighborhood_dist = group.address_count_by_neighborhood
 
-        stats_html = f"""
-        <div style="
-            position: fixed;
-            top: 10px;
-            right: 10px;
-            width: 200px;
-            background: white;
-            border: 2px solid #ccc;
-            border-radius: 5px;
-            padding: 10px;
-            font-family: Arial, sans-serif;
-            font-size: 12px;
-            z-index: 9999;
-        ">
-            <h4 style="margin: 0 0 10px 0;">分組統計</h4>
-            <p><strong>地址數量:</strong> {group.size} 個</p>
-            <p><strong>預估距離:</strong> {group.estimated_distance or 0:.0f} 公尺</p>
-            <p><strong>預估時間:</strong> {group.estimated_time or 0} 分鐘</p>
-            <p><strong>鄰別分布:</strong></p>
-            <ul style="margin: 5px 0; padding-left: 20px;">
-        """
+        parts = [
+            _GROUP_STATS_HEADER_HTML.format(
+                size=group.size,
+                distance=group.estimated_distance or 0,
+                time=group.estimated_time or 0,
+            )
+        ]
         
         for neighborhood, count in neighborhood_dist.items():
-            stats_html += f"<li>{neighborhood}鄰: {count}個</li>"
+            parts.append(f"<li>{neighborhood}鄰: {count}個</li>")
         
-        stats_html += """
-            </ul>
-        </div>
-        """
+        parts.append(_GROUP_STATS_FOOTER_HTML)
+        stats_html = "".join(parts)
         
         map_obj.get_root().html.add_child(folium.Element(stats_html))
 
     def _add_legend(self, map_obj: folium.Map, groups: List[RouteGroup]):
         """添加圖例"""
-        legend_html = """
-        <div style="
-            position: fixed;
-            bottom: 50px;
-            left: 10px;
-            width: 200px;
-            background: white;
-            border: 2px solid #ccc;
-            border-radius: 5px;
-            padding: 10px;
-            font-family: Arial, sans-serif;
-            font-size: 12px;
-            z-index: 9999;
-        ">
-            <h4 style="margin: 0 0 10px 0;">圖例</h4>
-        """
+        folium = _load_folium()
+
+        parts = [_LEGEND_HEADER_HTML]
         
         for i, group in enumerate(groups):
             color = self.color_scheme.get_group_color(i)
-            legend_html += f"""
-            <p style="margin: 5px 0;">
-                <span style="
-                    display: inline-block;
-                    width: 15px;
-                    height: 15px;
-                    background-color: {color};
-                    border: 1px solid #000;
-                    margin-right: 5px;
-                "></span>
-                {group.group_id} ({group.size}個)
-            </p>
-            """
+            parts.append(
+                _LEGEND_ITEM_HTML.format(
+                    color=color, group_id=group.group_id, size=group.size
+                )
+            )
         
-        legend_html += "</div>"
+        parts.append("</div>")
+        legend_html = "".join(parts)
         
         map_obj.get_root().html.add_child(folium.Element(legend_html))
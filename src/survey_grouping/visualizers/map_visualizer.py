@@ -3,12 +3,42 @@
 主要的地圖視覺化類別，整合 Folium 渲染器和顏色配置。
 """
 
-from typing import List, Optional
+import gzip
+import logging
+from typing import TYPE_CHECKING, List, Optional
 from pathlib import Path
 
-from ..models.group import RouteGroup
+from ..models.group import RouteGroup, combined_extent
 from .folium_renderer import FoliumRenderer
 
+if TYPE_CHECKING:
+    import folium
+
+logger = logging.getLogger(__name__)
+
+
+def _write_map(
+    map_obj: "folium.Map", output_file: Path, compress: bool = False
+) -> Path:
+    """渲染地圖一次並直接寫入 HTML 檔案
+
+    Args:
+        map_obj: Folium 地圖物件
+        output_file: 輸出檔案路徑
+        compress: 是否另存為 gzip 壓縮檔（於檔名後加上 .gz）
+
+    Returns:
+        實際寫入的檔案路徑
+    """
+    html = map_obj.get_root().render()
+    if compress:
+        output_file = output_file.with_name(output_file.name + ".gz")
+        with gzip.open(output_file, "wb", compresslevel=6) as f:
+            f.write(html.encode("utf-8"))
+    else:
+        output_file.write_text(html, encoding="utf-8")
+    return output_file
+
 
 class MapVisualizer:
     """地圖視覺化器"""
@@ -22,6 +52,7 @@ class MapVisualizer:
         district: str,
         village: str,
         output_path: str,
+        compress: bool = False,
     ) -> bool:
         """建立總覽地圖
         
@@ -30,10 +61,24 @@ class MapVisualizer:
             district: 行政區名稱
             village: 村里名稱
             output_path: 輸出檔案路徑
+            compress: 是否輸出 gzip 壓縮檔（路徑加上 .gz）
             
         Returns:
             是否成功建立
         """
+        return self._save_overview_map(
+            groups, district, village, Path(output_path), compress
+        ) is not None
+
+    def _save_overview_map(
+        self,
+        groups: List[RouteGroup],
+        district: str,
+        village: str,
+        output_file: Path,
+        compress: bool,
+    ) -> Optional[Path]:
+        """建立並儲存總覽地圖，回傳實際寫入的路徑（壓縮時含 .gz），失敗時回傳 None"""
         try:
             # 建立地圖
             map_obj = self.renderer.create_overview_map(
@@ -41,17 +86,14 @@ class MapVisualizer:
             )
             
             # 確保輸出目錄存在
-            output_file = Path(output_path)
             output_file.parent.mkdir(parents=True, exist_ok=True)
             
             # 儲存地圖
-            map_obj.save(str(output_file))
+            return _write_map(map_obj, output_file, compress)
             
-            return True
-            
-        except Exception as e:
-            print(f"建立總覽地圖失敗: {e}")
-            return False
+        except Exception:
+            logger.exception("建立總覽地圖失敗")
+            return None
 
     def create_group_maps(
         self,
@@ -59,6 +101,7 @@ class MapVisualizer:
         district: str,
         village: str,
         output_dir: str,
+        compress: bool = False,
     ) -> List[str]:
         """建立個別分組地圖
         
@@ -67,6 +110,7 @@ class MapVisualizer:
             district: 行政區名稱
             village: 村里名稱
             output_dir: 輸出目錄
+            compress: 是否輸出 gzip 壓縮檔（檔名加上 .gz）
             
         Returns:
             成功建立的檔案路徑列表
@@ -87,11 +131,10 @@ class MapVisualizer:
                 file_path = output_path / filename
                 
                 # 儲存地圖
-                map_obj.save(str(file_path))
-                created_files.append(str(file_path))
+                created_files.append(str(_write_map(map_obj, file_path, compress)))
                 
-            except Exception as e:
-                print(f"建立分組地圖 {group.group_id} 失敗: {e}")
+            except Exception:
+                logger.exception("建立分組地圖 %s 失敗", group.group_id)
                 continue
 
         return created_files
@@ -104,6 +147,7 @@ class MapVisualizer:
         output_dir: str,
         overview_only: bool = False,
         groups_only: bool = False,
+        compress: bool = False,
     ) -> dict:
         """建立所有地圖
         
@@ -114,6 +158,7 @@ class MapVisualizer:
             output_dir: 輸出目錄
             overview_only: 只建立總覽地圖
             groups_only: 只建立分組地圖
+            compress: 是否輸出 gzip 壓縮檔
             
         Returns:
             建立結果字典
@@ -130,8 +175,14 @@ class MapVisualizer:
 
         # 建立總覽地圖
         if not groups_only:
-            overview_file = output_path / f"{district}{village}_總覽.html"
-            if self.create_overview_map(groups, district, village, str(overview_file)):
+            overview_file = self._save_overview_map(
+                groups,
+                district,
+                village,
+                output_path / f"{district}{village}_總覽.html",
+                compress,
+            )
+            if overview_file is not None:
                 result["overview_map"] = str(overview_file)
             else:
                 result["errors"].append("總覽地圖建立失敗")
@@ -139,7 +190,9 @@ class MapVisualizer:
 
         # 建立分組地圖
         if not overview_only:
-            group_files = self.create_group_maps(groups, district, village, output_dir)
+            group_files = self.create_group_maps(
+                groups, district, village, output_dir, compress
+            )
             result["group_maps"] = group_files
             
             if len(group_files) != len(groups):
@@ -159,33 +212,45 @@ class MapVisualizer:
         Returns:
             摘要資訊字典
         """
-        total_addresses = sum(group.size for group in groups)
-        total_distance = sum(group.estimated_distance or 0 for group in groups)
-        total_time = sum(group.estimated_time or 0 for group in groups)
-
-        # 計算地理範圍
-        all_coords = []
+        # 單次走訪分組，同時累計總量與整理分組明細
+        total_addresses = 0
+        total_distance = 0
+        total_time = 0
+        group_details = []
         for group in groups:
-            for addr in group.addresses:
-                if addr.has_valid_coordinates:
-                    all_coords.append((addr.y_coord, addr.x_coord))
+            size = group.size
+            total_addresses += size
+            total_distance += group.estimated_distance or 0
+            total_time += group.estimated_time or 0
+            group_details.append(
+                {
+                    "group_id": group.group_id,
+                    "size": size,
+                    "estimated_distance": group.estimated_distance,
+                    "estimated_time": group.estimated_time,
+                    "neighborhood_distribution": group.address_count_by_neighborhood,
+                }
+            )
+
+        # 由各分組快取的中心點與覆蓋範圍合併出整體地理範圍
+        center_coords, extent = combined_extent(groups)
 
         bounds = None
         center = None
-        if all_coords:
-            lats = [coord[0] for coord in all_coords]
-            lngs = [coord[1] for coord in all_coords]
-            
+        if center_coords is not None and extent is not None:
+            min_lat, min_lng, max_lat, max_lng = extent
+            avg_lat, avg_lng = center_coords
+
             bounds = {
-                "min_lat": min(lats),
-                "max_lat": max(lats),
-                "min_lng": min(lngs),
-                "max_lng": max(lngs),
+                "min_lat": min_lat,
+                "max_lat": max_lat,
+                "min_lng": min_lng,
+                "max_lng": max_lng,
             }
-            
+
             center = {
-                "lat": sum(lats) / len(lats),
-                "lng": sum(lngs) / len(lngs),
+                "lat": avg_lat,
+                "lng": avg_lng,
             }
 
         return {
@@ -196,14 +261,5 @@ class MapVisualizer:
             "total_time": total_time,
             "geographic_bounds": bounds,
             "geographic_center": center,
-            "group_details": [
-                {
-                    "group_id": group.group_id,
-                    "size": group.size,
-                    "estimated_distance": group.estimated_distance,
-                    "estimated_time": group.estimated_time,
-                    "neighborhood_distribution": group.address_count_by_neighborhood,
-                }
-                for group in groups
-            ],
+            "group_details": group_details,
         }
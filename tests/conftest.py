@@ -5,20 +5,52 @@
 
 import pytest
 import csv
+import functools
+import itertools
+import logging
 from datetime import datetime
 from typing import List
 from pathlib import Path
 from pyproj import CRS, Transformer
 from survey_grouping.models.address import Address, AddressType
 from survey_grouping.models.group import RouteGroup, GroupingResult
+from survey_grouping.algorithms.route_optimizer import RouteOptimizer
+
+logger = logging.getLogger(__name__)
+
+
+def pytest_addoption(parser):
+    """加入 --run-slow 選項"""
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="一併執行標記為 slow 的測試",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """未指定 --run-slow（或以 -m 明確篩選 slow）時取消選取 slow 測試"""
+    if config.getoption("--run-slow") or "slow" in config.getoption("markexpr"):
+        return
+
+    selected, deselected = [], []
+    for item in items:
+        (deselected if item.get_closest_marker("slow") else selected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+# 全形數字轉半形數字的對照表
+FULL_TO_HALF_NUMBERS = str.maketrans("０１２３４５６７８９", "0123456789")
 
 
 def normalize_numbers(text: str) -> str:
     """將全形數字轉換為半形數字"""
     if not text:
         return text
-    full_to_half_numbers = str.maketrans("０１２３４５６７８９", "0123456789")
-    return text.translate(full_to_half_numbers)
+    return text.translate(FULL_TO_HALF_NUMBERS)
 
 
 def generate_full_address(
@@ -32,214 +64,259 @@ def generate_full_address(
     number: str = "",
 ) -> str:
     """生成完整地址"""
-    parts = ["台南市", district, village, f"{neighborhood}鄰"]
+    # 空字串不影響結果，只有巷、弄需要依是否有值加上單位
+    lane = f"{lane}巷" if lane else ""
+    alley = f"{alley}弄" if alley else ""
+    return (
+        f"台南市{district}{village}{neighborhood}鄰{street}{area}{lane}{alley}{number}"
+    )
 
-    if street:
-        parts.append(street)
-    if area:
-        parts.append(area)
-    if lane:
-        parts.append(f"{lane}巷")
-    if alley:
-        parts.append(f"{alley}弄")
-    if number:
-        parts.append(number)
 
-    return "".join(parts)
+# sample.csv 中代表性資料的索引（不含標題列）
+REPRESENTATIVE_INDICES: frozenset[int] = frozenset(
+    (
+        0,  # 基本地址：新營區三仙里17鄰三民路97之3號
+        5,  # 有完整門牌：新營區三仙里17鄰三民路99號之7
+        56,  # 有巷：新營區三仙里1鄰三民路138號之6
+        150,  # 有巷弄：新營區三仙里16鄰三興街32巷1號
+        170,  # 完整巷弄：新營區三仙里15鄰三興街144巷1弄1號
+        300,  # 地區型：官田區渡拔里1鄰渡子頭1號之11
+        320,  # 複雜地址：官田區渡拔里2鄰渡子頭25號之1
+        200,  # 樓層地址：新營區三仙里4鄰三興街52之2號二樓之1
+        400,  # 不同區域：官田區渡拔里3鄰渡子頭44號之1
+        100,  # 中華路：新營區三仙里11鄰中華路33號
+        250,  # 健康路：新營區三仙里3鄰健康路1號
+        450,  # 八田路：官田區烏山頭里12鄰八田路三段水廠巷2號
+        500,  # 嘉南：官田區烏山頭里11鄰嘉南1號之61
+        350,  # 隆林路：官田區渡拔里24鄰隆林路760號
+        15,  # 不同鄰別：新營區三仙里17鄰三民路101之15號
+    )
+)
+
+
+# sample.csv 使用的欄位
+SAMPLE_COLUMNS = (
+    "區",
+    "村里",
+    "鄰",
+    "街、路段",
+    "地區",
+    "巷",
+    "弄",
+    "號",
+    "橫座標",
+    "縱座標",
+)
+
+
+@functools.lru_cache(maxsize=1)
+def get_twd97_transformer() -> Transformer:
+    """取得 TWD97 → WGS84 座標轉換器（只建立一次）"""
+    twd97 = CRS.from_epsg(3826)  # TWD97 TM2
+    wgs84 = CRS.from_epsg(4326)  # WGS84
+    return Transformer.from_crs(twd97, wgs84, always_xy=True)
 
 
+@functools.lru_cache(maxsize=1)
 def load_representative_sample_data() -> List[Address]:
-    """載入代表性的 sample.csv 資料"""
+    """載入代表性的 sample.csv 資料（整個測試階段只解析一次）"""
     sample_file = Path("sample.csv")
     if not sample_file.exists():
         return get_default_test_addresses()
 
-    # 設定座標轉換器
-    twd97 = CRS.from_epsg(3826)  # TWD97 TM2
-    wgs84 = CRS.from_epsg(4326)  # WGS84
-    transformer = Transformer.from_crs(twd97, wgs84, always_xy=True)
-
+    rows = []
     addresses = []
     try:
-        with open(sample_file, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-
-            # 選擇代表性資料的索引
-            representative_indices = [
-                0,  # 基本地址：新營區三仙里17鄰三民路97之3號
-                5,  # 有完整門牌：新營區三仙里17鄰三民路99號之7
-                56,  # 有巷：新營區三仙里1鄰三民路138號之6
-                150,  # 有巷弄：新營區三仙里16鄰三興街32巷1號
-                170,  # 完整巷弄：新營區三仙里15鄰三興街144巷1弄1號
-                300,  # 地區型：官田區渡拔里1鄰渡子頭1號之11
-                320,  # 複雜地址：官田區渡拔里2鄰渡子頭25號之1
-                200,  # 樓層地址：新營區三仙里4鄰三興街52之2號二樓之1
-                400,  # 不同區域：官田區渡拔里3鄰渡子頭44號之1
-                100,  # 中華路：新營區三仙里11鄰中華路33號
-                250,  # 健康路：新營區三仙里3鄰健康路1號
-                450,  # 八田路：官田區烏山頭里12鄰八田路三段水廠巷2號
-                500,  # 嘉南：官田區烏山頭里11鄰嘉南1號之61
-                350,  # 隆林路：官田區渡拔里24鄰隆林路760號
-                15,  # 不同鄰別：新營區三仙里17鄰三民路101之15號
-            ]
-
-            for i, row in enumerate(reader):
-                if i in representative_indices and len(addresses) < 15:
-                    try:
-                        # 轉換 TWD97 座標為 WGS84
-                        twd97_x = float(row["橫座標"])
-                        twd97_y = float(row["縱座標"])
-                        wgs84_lon, wgs84_lat = transformer.transform(twd97_x, twd97_y)
-
-                        # 正規化文字（全形數字轉半形）
-                        district = normalize_numbers(row["區"])
-                        village = normalize_numbers(row["村里"])
-                        neighborhood = int(normalize_numbers(row["鄰"]))
-                        street = normalize_numbers(row["街、路段"])
-                        area = normalize_numbers(row["地區"])
-                        lane = normalize_numbers(row["巷"])
-                        alley = normalize_numbers(row["弄"])
-                        number = normalize_numbers(row["號"])
-
-                        # 生成完整地址
-                        full_address = generate_full_address(
-                            district,
-                            village,
-                            neighborhood,
-                            street,
-                            area,
-                            lane,
-                            alley,
-                            number,
-                        )
-
-                        address = Address(
-                            id=len(addresses) + 1,
-                            district=district,
-                            village=village,
-                            neighborhood=neighborhood,
-                            street=street or None,
-                            area=area or None,
-                            lane=lane or None,
-                            alley=alley or None,
-                            number=number or None,
-                            x_coord=wgs84_lon,
-                            y_coord=wgs84_lat,
-                            full_address=full_address,
-                        )
-                        addresses.append(address)
-
-                    except (ValueError, KeyError) as e:
-                        print(f"跳過無效資料行 {i}: {e}")
-                        continue
+        # newline="" 交由 csv 模組處理換行；較大的讀取緩衝減少系統呼叫
+        with open(
+            sample_file, "r", encoding="utf-8", newline="", buffering=1 << 16
+        ) as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            col = {name: header.index(name) for name in SAMPLE_COLUMNS}
+
+            # 依索引順序跳讀，資料列直接以欄位位置取值，不建立 dict
+            previous = -1
+            for i in sorted(REPRESENTATIVE_INDICES):
+                row = next(itertools.islice(reader, i - previous - 1, None), None)
+                if row is None:
+                    break
+                previous = i
+
+                try:
+                    twd97_x = float(row[col["橫座標"]])
+                    twd97_y = float(row[col["縱座標"]])
+                except (ValueError, IndexError) as e:
+                    logger.debug("跳過無效資料行 %d: %s", i, e)
+                    continue
+                rows.append((i, row, twd97_x, twd97_y))
+
+        # 一次批次轉換所有 TWD97 座標為 WGS84
+        if rows:
+            wgs84_lons, wgs84_lats = get_twd97_transformer().transform(
+                [twd97_x for _, _, twd97_x, _ in rows],
+                [twd97_y for _, _, _, twd97_y in rows],
+            )
+        else:
+            wgs84_lons, wgs84_lats = [], []
+
+        for (i, row, _, _), wgs84_lon, wgs84_lat in zip(rows, wgs84_lons, wgs84_lats):
+            try:
+                # 正規化文字（全形數字轉半形）
+                district = normalize_numbers(row[col["區"]])
+                village = normalize_numbers(row[col["村里"]])
+                neighborhood = int(normalize_numbers(row[col["鄰"]]))
+                street = normalize_numbers(row[col["街、路段"]])
+                area = normalize_numbers(row[col["地區"]])
+                lane = normalize_numbers(row[col["巷"]])
+                alley = normalize_numbers(row[col["弄"]])
+                number = normalize_numbers(row[col["號"]])
+
+                # 生成完整地址
+                full_address = generate_full_address(
+                    district,
+                    village,
+                    neighborhood,
+                    street,
+                    area,
+                    lane,
+                    alley,
+                    number,
+                )
+
+                # 欄位已於上方解析為正確型別，略過 pydantic 驗證
+                address = Address.model_construct(
+                    id=len(addresses) + 1,
+                    district=district,
+                    village=village,
+                    neighborhood=neighborhood,
+                    street=street or None,
+                    area=area or None,
+                    lane=lane or None,
+                    alley=alley or None,
+                    number=number or None,
+                    x_coord=wgs84_lon,
+                    y_coord=wgs84_lat,
+                    full_address=full_address,
+                )
+                addresses.append(address)
+
+            except (ValueError, IndexError) as e:
+                logger.debug("跳過無效資料行 %d: %s", i, e)
+                continue
 
     except Exception as e:
-        print(f"載入 sample.csv 失敗: {e}")
+        logger.warning("載入 sample.csv 失敗，改用預設測試資料: %s", e)
         return get_default_test_addresses()
 
     return addresses if addresses else get_default_test_addresses()
 
 
+# 預設測試資料（當 sample.csv 不可用時），只建立一次
+# 測試資料皆為已知有效值，以 model_construct 略過 pydantic 驗證
+_DEFAULT_TEST_ADDRESSES: tuple[Address, ...] = (
+    Address.model_construct(
+        id=1,
+        district="安南區",
+        village="安慶里",
+        neighborhood=1,
+        street="安中路",
+        area="一段",
+        number="100號",
+        x_coord=120.2436,
+        y_coord=23.0478,
+        full_address="台南市安南區安慶里1鄰安中路一段100號",
+    ),
+    Address.model_construct(
+        id=2,
+        district="安南區",
+        village="安慶里",
+        neighborhood=1,
+        street="安中路",
+        area="一段",
+        number="102號",
+        x_coord=120.2438,
+        y_coord=23.0480,
+        full_address="台南市安南區安慶里1鄰安中路一段102號",
+    ),
+    Address.model_construct(
+        id=3,
+        district="安南區",
+        village="安慶里",
+        neighborhood=2,
+        street="安中路",
+        area="一段",
+        number="200號",
+        x_coord=120.2440,
+        y_coord=23.0485,
+        full_address="台南市安南區安慶里2鄰安中路一段200號",
+    ),
+    Address.model_construct(
+        id=4,
+        district="安南區",
+        village="安慶里",
+        neighborhood=2,
+        street="安中路",
+        area="一段",
+        number="202號",
+        x_coord=120.2442,
+        y_coord=23.0487,
+        full_address="台南市安南區安慶里2鄰安中路一段202號",
+    ),
+    Address.model_construct(
+        id=5,
+        district="安南區",
+        village="安慶里",
+        neighborhood=3,
+        street="安中路",
+        area="一段",
+        number="300號",
+        x_coord=120.2445,
+        y_coord=23.0490,
+        full_address="台南市安南區安慶里3鄰安中路一段300號",
+    ),
+)
+
+
 def get_default_test_addresses() -> List[Address]:
     """提供預設測試資料（當 sample.csv 不可用時）"""
-    return [
-        Address(
-            id=1,
-            district="安南區",
-            village="安慶里",
-            neighborhood=1,
-            street="安中路",
-            area="一段",
-            number="100號",
-            x_coord=120.2436,
-            y_coord=23.0478,
-            full_address="台南市安南區安慶里1鄰安中路一段100號",
-        ),
-        Address(
-            id=2,
-            district="安南區",
-            village="安慶里",
-            neighborhood=1,
-            street="安中路",
-            area="一段",
-            number="102號",
-            x_coord=120.2438,
-            y_coord=23.0480,
-            full_address="台南市安南區安慶里1鄰安中路一段102號",
-        ),
-        Address(
-            id=3,
-            district="安南區",
-            village="安慶里",
-            neighborhood=2,
-            street="安中路",
-            area="一段",
-            number="200號",
-            x_coord=120.2440,
-            y_coord=23.0485,
-            full_address="台南市安南區安慶里2鄰安中路一段200號",
-        ),
-        Address(
-            id=4,
-            district="安南區",
-            village="安慶里",
-            neighborhood=2,
-            street="安中路",
-            area="一段",
-            number="202號",
-            x_coord=120.2442,
-            y_coord=23.0487,
-            full_address="台南市安南區安慶里2鄰安中路一段202號",
-        ),
-        Address(
-            id=5,
-            district="安南區",
-            village="安慶里",
-            neighborhood=3,
-            street="安中路",
-            area="一段",
-            number="300號",
-            x_coord=120.2445,
-            y_coord=23.0490,
-            full_address="台南市安南區安慶里3鄰安中路一段300號",
-        ),
-    ]
+    return list(_DEFAULT_TEST_ADDRESSES)
 
 
 @pytest.fixture
 def sample_addresses() -> List[Address]:
-    """提供測試用的地址資料（使用真實 sample.csv 資料）"""
-    return load_representative_sample_data()
+    """提供測試用的地址資料（使用真實 sample.csv 資料）
 
+    資料只載入一次；每個測試取得各自的副本，避免分類器等就地修改互相影響。
+    """
+    return [addr.model_copy() for addr in load_representative_sample_data()]
 
-@pytest.fixture
-def sample_route_group(sample_addresses) -> RouteGroup:
-    """提供測試用的路線分組"""
-    return RouteGroup(
-        group_id="G001",
-        addresses=sample_addresses[:3],
-        estimated_distance=500.0,
-        estimated_time=30,
-        route_order=[1, 2, 3],
-        target_size=3,
-    )
 
+@pytest.fixture(scope="session")
+def optimizer_results() -> dict:
+    """各路線演算法在測試地址上的比較結果（整個測試階段只計算一次）"""
+    return RouteOptimizer().compare_algorithms(load_representative_sample_data())
 
-@pytest.fixture
-def sample_grouping_result(sample_addresses) -> GroupingResult:
-    """提供測試用的分組結果"""
-    group1 = RouteGroup(
+
+@pytest.fixture(scope="session")
+def sample_route_group() -> RouteGroup:
+    """提供測試用的路線分組（整個測試階段共用，測試只能讀取）"""
+    return RouteGroup(
         group_id="G001",
-        addresses=sample_addresses[:3],
+        addresses=[addr.model_copy() for addr in load_representative_sample_data()[:3]],
         estimated_distance=500.0,
         estimated_time=30,
         route_order=[1, 2, 3],
         target_size=3,
     )
 
+
+@pytest.fixture(scope="session")
+def sample_grouping_result(sample_route_group) -> GroupingResult:
+    """提供測試用的分組結果（第一組即 sample_route_group，整個測試階段共用）"""
     group2 = RouteGroup(
         group_id="G002",
-        addresses=sample_addresses[3:],
+        addresses=[addr.model_copy() for addr in load_representative_sample_data()[3:]],
         estimated_distance=300.0,
         estimated_time=20,
         route_order=[4, 5],
@@ -252,15 +329,21 @@ def sample_grouping_result(sample_addresses) -> GroupingResult:
         target_size=3,
         total_addresses=5,
         total_groups=2,
-        groups=[group1, group2],
+        groups=[sample_route_group, group2],
         created_at=datetime.now(),
     )
 
 
-@pytest.fixture
-def invalid_addresses() -> List[Address]:
-    """提供測試用的無效地址資料"""
-    return [
+@pytest.fixture(scope="session")
+def sample_groups(sample_grouping_result) -> tuple[RouteGroup, ...]:
+    """提供測試用的兩個路線分組（即 sample_grouping_result.groups，整個測試階段共用）"""
+    return tuple(sample_grouping_result.groups)
+
+
+@pytest.fixture(scope="session")
+def invalid_addresses() -> tuple[Address, ...]:
+    """提供測試用的無效地址資料（整個測試階段共用，以 tuple 避免被修改）"""
+    return (
         Address(
             id=100,
             district="",  # 空的區域
@@ -279,29 +362,51 @@ def invalid_addresses() -> List[Address]:
             y_coord=50.0,
             full_address="無效地址",
         ),
-    ]
+    )
+
+
+@pytest.fixture(scope="session")
+def duplicate_address() -> Address:
+    """提供與第一筆範例地址座標、完整地址相同的重複地址"""
+    return Address(
+        id=999,
+        district="安南區",
+        village="安慶里",
+        neighborhood=1,
+        x_coord=120.2436,
+        y_coord=23.0478,
+        full_address="台南市安南區安慶里1鄰安中路一段100號",
+    )
 
 
 @pytest.fixture
 def mock_supabase_client():
     """模擬 Supabase 客戶端"""
 
+    # 回應物件只持有資料列表的參照，可安全地重複使用
     class MockSupabaseClient:
         def __init__(self):
             self.data = []
+            self._tables = {}
+            self._rpc = MockRPC()
 
         def table(self, table_name):
-            return MockTable(self.data)
+            if table_name not in self._tables:
+                self._tables[table_name] = MockTable(self.data)
+            return self._tables[table_name]
 
         def rpc(self, function_name, params=None):
-            return MockRPC()
+            return self._rpc
 
     class MockTable:
         def __init__(self, data):
             self.data = data
             self._filters = {}
+            self._response = MockResponse(data)
 
         def select(self, columns="*"):
+            # 表格物件會被重複使用，每次查詢開始時清除前一次的篩選條件
+            self._filters = {}
             return self
 
         def eq(self, column, value):
@@ -312,11 +417,14 @@ def mock_supabase_client():
             return self
 
         def execute(self):
-            return MockResponse(self.data)
+            return self._response
 
     class MockRPC:
+        def __init__(self):
+            self._response = MockResponse([])
+
         def execute(self):
-            return MockResponse([])
+            return self._response
 
     class MockResponse:
         def __init__(self, data):
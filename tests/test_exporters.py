@@ -3,15 +3,34 @@
 測試 CSV、JSON、Excel 匯出功能。
 """
 
+import csv
 import json
-import tempfile
 from pathlib import Path
 import pandas as pd
+import pytest
+from openpyxl import load_workbook
+from survey_grouping.exporters import json_exporter
 from survey_grouping.exporters.csv_exporter import CSVExporter
 from survey_grouping.exporters.json_exporter import JSONExporter
 from survey_grouping.exporters.excel_exporter import ExcelExporter
 
 
+def _read_csv(path):
+    """以 csv 模組讀回匯出檔，回傳 (標題列, 資料列)"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header, *rows = csv.reader(f)
+    return header, rows
+
+
+def _sheet_names(path):
+    """只讀取活頁簿結構，取得工作表名稱"""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
 class TestCSVExporter:
     """CSV 匯出器測試"""
 
@@ -19,25 +38,23 @@ class TestCSVExporter:
         """測試分組匯出到 CSV"""
         output_path = temp_output_dir / "groups.csv"
 
-        success = CSVExporter.export_groups(
-            sample_grouping_result.groups, str(output_path)
-        )
+        success = CSVExporter.export_groups(sample_grouping_result.groups, output_path)
 
         assert success is True
         assert output_path.exists()
 
         # 檢查檔案內容
-        df = pd.read_csv(output_path)
-        assert len(df) == 5  # 總共 5 個地址
-        assert "分組編號" in df.columns
-        assert "完整地址" in df.columns
+        header, rows = _read_csv(output_path)
+        assert len(rows) == 5  # 總共 5 個地址
+        assert "分組編號" in header
+        assert "完整地址" in header
 
     def test_export_grouping_result(self, sample_grouping_result, temp_output_dir):
         """測試完整分組結果匯出"""
         output_path = temp_output_dir / "result.csv"
 
         success = CSVExporter.export_grouping_result(
-            sample_grouping_result, str(output_path)
+            sample_grouping_result, output_path
         )
 
         assert success is True
@@ -47,23 +64,23 @@ class TestCSVExporter:
         """測試摘要匯出"""
         output_path = temp_output_dir / "summary.csv"
 
-        success = CSVExporter.export_summary(sample_grouping_result, str(output_path))
+        success = CSVExporter.export_summary(sample_grouping_result, output_path)
 
         assert success is True
         assert output_path.exists()
 
         # 檢查檔案內容
-        df = pd.read_csv(output_path)
-        assert len(df) == 2  # 兩個分組
-        assert "分組編號" in df.columns
-        assert "分組大小" in df.columns
+        header, rows = _read_csv(output_path)
+        assert len(rows) == 2  # 兩個分組
+        assert "分組編號" in header
+        assert "分組大小" in header
 
     def test_export_addresses_only(self, sample_grouping_result, temp_output_dir):
         """測試僅匯出地址"""
         output_path = temp_output_dir / "addresses.csv"
 
         success = CSVExporter.export_addresses_only(
-            sample_grouping_result.groups, str(output_path)
+            sample_grouping_result.groups, output_path
         )
 
         assert success is True
@@ -72,13 +89,29 @@ class TestCSVExporter:
     def test_create_route_sheets(self, sample_grouping_result, temp_output_dir):
         """測試建立路線工作表"""
         created_files = CSVExporter.create_route_sheets(
-            sample_grouping_result, str(temp_output_dir)
+            sample_grouping_result, temp_output_dir
         )
 
         assert len(created_files) == 2  # 兩個分組
         for file_path in created_files:
             assert Path(file_path).exists()
 
+    def test_create_route_sheets_duplicate_group_id(
+        self, sample_grouping_result, temp_output_dir
+    ):
+        """測試分組編號重複時由最後一個分組覆寫檔案"""
+        first, second = sample_grouping_result.groups
+        result = sample_grouping_result.model_copy(
+            update={"groups": [first, second.model_copy(update={"group_id": "G001"})]}
+        )
+
+        created_files = CSVExporter.create_route_sheets(result, temp_output_dir)
+
+        assert created_files[0] == created_files[1]
+        header, rows = _read_csv(created_files[1])
+        assert header[:2] == ["訪問順序", "地址ID"]
+        assert [int(row[1]) for row in rows] == [addr.id for addr in second.addresses]
+
 
 class TestJSONExporter:
     """JSON 匯出器測試"""
@@ -87,9 +120,7 @@ class TestJSONExporter:
         """測試分組匯出到 JSON"""
         output_path = temp_output_dir / "groups.json"
 
-        success = JSONExporter.export_groups(
-            sample_grouping_result.groups, str(output_path)
-        )
+        success = JSONExporter.export_groups(sample_grouping_result.groups, output_path)
 
         assert success is True
         assert output_path.exists()
@@ -107,7 +138,7 @@ class TestJSONExporter:
         output_path = temp_output_dir / "result.json"
 
         success = JSONExporter.export_grouping_result(
-            sample_grouping_result, str(output_path)
+            sample_grouping_result, output_path
         )
 
         assert success is True
@@ -126,7 +157,7 @@ class TestJSONExporter:
         output_path = temp_output_dir / "groups.geojson"
 
         success = JSONExporter.export_geojson(
-            sample_grouping_result.groups, str(output_path)
+            sample_grouping_result.groups, output_path
         )
 
         assert success is True
@@ -147,7 +178,7 @@ class TestJSONExporter:
         output_path = temp_output_dir / "route_data.json"
 
         success = JSONExporter.export_route_optimization_data(
-            sample_grouping_result.groups, str(output_path)
+            sample_grouping_result.groups, output_path
         )
 
         assert success is True
@@ -166,7 +197,7 @@ class TestJSONExporter:
         output_path = temp_output_dir / "stats.json"
 
         success = JSONExporter.export_statistics_summary(
-            sample_grouping_result, str(output_path)
+            sample_grouping_result, output_path
         )
 
         assert success is True
@@ -180,6 +211,40 @@ class TestJSONExporter:
         assert "group_size_analysis" in data
         assert "distance_analysis" in data
 
+    def test_stdlib_fallback_matches_orjson(
+        self, sample_grouping_result, temp_output_dir, monkeypatch
+    ):
+        """測試未安裝 orjson 時改用標準函式庫，且輸出與 orjson 完全相同"""
+        pytest.importorskip("orjson")
+        groups = sample_grouping_result.groups
+        exports = {
+            "groups.json": (JSONExporter.export_groups, groups),
+            "result.json": (
+                JSONExporter.export_grouping_result,
+                sample_grouping_result,
+            ),
+            "route_data.json": (
+                JSONExporter.export_route_optimization_data,
+                groups,
+            ),
+            "stats.json": (
+                JSONExporter.export_statistics_summary,
+                sample_grouping_result,
+            ),
+        }
+
+        def export_all(output_dir):
+            for name, (export, data) in exports.items():
+                assert export(data, output_dir / name) is True
+
+        export_all(temp_output_dir / "orjson")
+        monkeypatch.setattr(json_exporter, "orjson", None)
+        export_all(temp_output_dir / "stdlib")
+
+        for name in exports:
+            expected = (temp_output_dir / "orjson" / name).read_bytes()
+            assert (temp_output_dir / "stdlib" / name).read_bytes() == expected
+
 
 class TestExcelExporter:
     """Excel 匯出器測試"""
@@ -189,14 +254,14 @@ class TestExcelExporter:
         output_path = temp_output_dir / "groups.xlsx"
 
         success = ExcelExporter.export_groups(
-            sample_grouping_result.groups, str(output_path)
+            sample_grouping_result.groups, output_path
         )
 
         assert success is True
         assert output_path.exists()
 
         # 檢查檔案內容
-        df = pd.read_excel(output_path)
+        df = pd.read_excel(output_path, engine="openpyxl")
         assert len(df) == 5  # 總共 5 個地址
         assert "分組編號" in df.columns
 
@@ -207,33 +272,33 @@ class TestExcelExporter:
         output_path = temp_output_dir / "result_multi.xlsx"
 
         success = ExcelExporter.export_grouping_result_multi_sheet(
-            sample_grouping_result, str(output_path)
+            sample_grouping_result, output_path
         )
 
         assert success is True
         assert output_path.exists()
 
         # 檢查工作表
-        excel_file = pd.ExcelFile(output_path)
-        assert "分組摘要" in excel_file.sheet_names
-        assert "詳細地址" in excel_file.sheet_names
-        assert "統計資訊" in excel_file.sheet_names
+        sheet_names = _sheet_names(output_path)
+        assert "分組摘要" in sheet_names
+        assert "詳細地址" in sheet_names
+        assert "統計資訊" in sheet_names
 
     def test_create_route_workbook(self, sample_grouping_result, temp_output_dir):
         """測試路線工作簿建立"""
         output_path = temp_output_dir / "routes.xlsx"
 
         success = ExcelExporter.create_route_workbook(
-            sample_grouping_result, str(output_path)
+            sample_grouping_result, output_path
         )
 
         assert success is True
         assert output_path.exists()
 
         # 檢查工作表
-        excel_file = pd.ExcelFile(output_path)
-        assert "總覽" in excel_file.sheet_names
-        assert len(excel_file.sheet_names) == 3  # 總覽 + 2個路線工作表
+        sheet_names = _sheet_names(output_path)
+        assert "總覽" in sheet_names
+        assert len(sheet_names) == 3  # 總覽 + 2個路線工作表
 
     def test_export_comparison_analysis(self, sample_grouping_result, temp_output_dir):
         """測試比較分析匯出"""
@@ -242,7 +307,7 @@ class TestExcelExporter:
         # 建立多個結果進行比較
         results = [sample_grouping_result, sample_grouping_result]
 
-        success = ExcelExporter.export_comparison_analysis(results, str(output_path))
+        success = ExcelExporter.export_comparison_analysis(results, output_path)
 
         assert success is True
         assert output_path.exists()
@@ -252,15 +317,14 @@ class TestExcelExporter:
         output_path = temp_output_dir / "quality.xlsx"
 
         success = ExcelExporter.export_quality_report(
-            sample_grouping_result, str(output_path)
+            sample_grouping_result, output_path
         )
 
         assert success is True
         assert output_path.exists()
 
         # 檢查工作表
-        excel_file = pd.ExcelFile(output_path)
-        assert "品質評估" in excel_file.sheet_names
+        assert "品質評估" in _sheet_names(output_path)
 
 
 class TestExporterErrorHandling:
@@ -298,11 +362,12 @@ class TestExporterErrorHandling:
         """測試匯出空分組"""
         output_path = temp_output_dir / "empty.csv"
 
-        success = CSVExporter.export_groups([], str(output_path))
+        success = CSVExporter.export_groups([], output_path)
 
         assert success is True
         assert output_path.exists()
 
         # 檢查檔案內容
-        df = pd.read_csv(output_path)
-        assert len(df) == 0  # 空檔案
+        header, rows = _read_csv(output_path)
+        assert "分組編號" in header
+        assert len(rows) == 0  # 只有標題列
@@ -6,7 +6,7 @@
 import pytest
 from datetime import datetime
 from survey_grouping.models.address import Address, AddressType
-from survey_grouping.models.group import RouteGroup, GroupingResult
+from survey_grouping.models.group import RouteGroup, GroupingResult, combined_extent
 
 
 class TestAddress:
@@ -158,6 +158,78 @@ class TestRouteGroup:
         assert isinstance(distribution, dict)
         assert len(distribution) > 0
 
+    def test_statistics_follow_address_changes(self, sample_addresses):
+        """測試地址增減或替換後統計會重新計算"""
+        group = RouteGroup(
+            group_id="G001",
+            addresses=sample_addresses[:2],
+        )
+        assert sum(group.address_count_by_neighborhood.values()) == 2
+
+        group.addresses.append(sample_addresses[2])
+        assert sum(group.address_count_by_neighborhood.values()) == 3
+
+        group.addresses = sample_addresses[:1]
+        assert group.center_coordinates == sample_addresses[0].coordinates
+
+    def test_statistics_follow_in_place_address_edits(self, sample_addresses):
+        """測試就地替換地址或修改座標、鄰別後統計會重新計算"""
+        group = RouteGroup(
+            group_id="G001",
+            addresses=sample_addresses[:3],
+            route_order=[99, 1, 2],
+        )
+        assert [addr.id for addr in group.get_ordered_addresses()] == [1, 2]
+        matrix = group.distance_matrix
+
+        group.addresses[2] = sample_addresses[0].model_copy(
+            update={"id": 99, "neighborhood": 9}
+        )
+        assert [addr.id for addr in group.get_ordered_addresses()] == [99, 1, 2]
+        assert group.address_count_by_neighborhood[9] == 1
+        assert group.distance_matrix[0, 2] == 0.0
+        assert group.distance_matrix is not matrix
+
+        group.addresses[0].x_coord += 0.01
+        group.addresses[0].y_coord += 0.01
+        assert group.center_coordinates == pytest.approx(
+            (
+                sum(addr.x_coord for addr in group.addresses) / 3,
+                sum(addr.y_coord for addr in group.addresses) / 3,
+            )
+        )
+        assert group.coverage_area[2] == group.addresses[0].y_coord
+
+    def test_equality_ignores_cached_statistics(self, sample_addresses):
+        """測試讀取統計（快取含 NumPy 陣列）後仍可比較分組是否相等"""
+        group1 = RouteGroup(group_id="G001", addresses=sample_addresses[:3])
+        group2 = RouteGroup(
+            group_id="G001",
+            addresses=[addr.model_copy() for addr in sample_addresses[:3]],
+        )
+        assert group1.center_coordinates is not None
+        assert group1.distance_matrix.shape == (3, 3)
+        assert group1 == group2
+
+        assert group2.center_coordinates is not None
+        assert group2.distance_matrix.shape == (3, 3)
+        assert group1 == group2
+        assert group1 != RouteGroup(group_id="G001", addresses=sample_addresses[:2])
+
+        result1, result2 = (
+            GroupingResult(
+                district="安南區",
+                village="安慶里",
+                target_size=3,
+                total_addresses=3,
+                total_groups=1,
+                groups=[group],
+                created_at=datetime(2024, 1, 1),
+            )
+            for group in (group1, group2)
+        )
+        assert result1 == result2
+
     def test_route_distance_calculation(self, sample_addresses):
         """測試路線距離計算"""
         group = RouteGroup(
@@ -169,6 +241,21 @@ class TestRouteGroup:
         distance = group.calculate_route_distance()
         assert distance >= 0
 
+    def test_distance_matrix(self, sample_addresses):
+        """測試距離矩陣與 Address.distance_to 一致"""
+        group = RouteGroup(
+            group_id="G001",
+            addresses=sample_addresses[:3],
+        )
+
+        matrix = group.distance_matrix
+        assert matrix.shape == (3, 3)
+        assert matrix[0, 0] == 0.0
+        assert matrix[0, 1] == pytest.approx(
+            sample_addresses[0].distance_to(sample_addresses[1])
+        )
+        assert matrix[1, 0] == matrix[0, 1]
+
     def test_route_optimization(self, sample_addresses):
         """測試路線優化"""
         group = RouteGroup(
@@ -190,6 +277,64 @@ class TestRouteGroup:
         neighborhood_1_addrs = group.get_addresses_by_neighborhood(1)
         assert len(neighborhood_1_addrs) == 2  # 根據測試資料
 
+    def test_ordered_addresses(self, sample_addresses):
+        """測試依路線順序取得地址與訪問順序（略過不存在的 id）"""
+        group = RouteGroup(
+            group_id="G001",
+            addresses=sample_addresses[:3],
+            route_order=[3, 99, 1, 2],
+        )
+
+        ordered = group.get_ordered_addresses()
+        assert [addr.id for addr in ordered] == [3, 1, 2]
+        stops = group.get_route_stops()
+        assert [(order, addr.id) for order, addr in stops] == [(1, 3), (3, 1), (4, 2)]
+
+        group.route_order = []
+        assert group.get_ordered_addresses() == group.addresses
+        assert group.get_route_stops() == []
+
+    def test_route_coordinates(self, sample_addresses):
+        """測試依路線順序取得有效座標（略過不存在的 id 與缺座標的地址）"""
+        no_coords = sample_addresses[0].model_copy(
+            update={"id": 99, "x_coord": None, "y_coord": None}
+        )
+        group = RouteGroup(
+            group_id="G001",
+            addresses=[*sample_addresses[:3], no_coords],
+            route_order=[3, 99, 42, 1],
+        )
+
+        coords = group.get_route_coordinates()
+        assert coords.tolist() == [
+            [sample_addresses[2].y_coord, sample_addresses[2].x_coord],
+            [sample_addresses[0].y_coord, sample_addresses[0].x_coord],
+        ]
+        assert not coords.flags.writeable
+
+        group.route_order = []
+        assert len(group.get_route_coordinates()) == 3
+
+    def test_combined_extent(self, sample_addresses):
+        """測試合併多個分組的中心點（依有效座標數加權）與覆蓋範圍"""
+        no_coords = sample_addresses[0].model_copy(
+            update={"id": 99, "x_coord": None, "y_coord": None}
+        )
+        groups = [
+            RouteGroup(group_id="G001", addresses=sample_addresses[:3]),
+            RouteGroup(group_id="G002", addresses=[*sample_addresses[3:], no_coords]),
+            RouteGroup(group_id="G003", addresses=[no_coords]),
+        ]
+
+        center, extent = combined_extent(groups)
+
+        lats = [addr.y_coord for addr in sample_addresses]
+        lngs = [addr.x_coord for addr in sample_addresses]
+        assert center == pytest.approx((sum(lats) / 5, sum(lngs) / 5))
+        assert extent == (min(lats), min(lngs), max(lats), max(lngs))
+        assert combined_extent([groups[2]]) == (None, None)
+        assert combined_extent([]) == (None, None)
+
 
 class TestGroupingResult:
     """分組結果測試"""
@@ -13,6 +13,12 @@ from survey_grouping.utils.validators import (
 from survey_grouping.models.address import Address
 
 
+def assert_error_contains(errors, needle):
+    """檢查錯誤訊息列表中是否有包含指定字串的訊息"""
+    joined = "\n".join(errors)
+    assert needle in joined, f"{needle!r} not in {joined!r}"
+
+
 class TestAddressValidator:
     """地址驗證器測試"""
 
@@ -31,34 +37,30 @@ class TestAddressValidator:
 
         assert is_valid is False
         assert len(errors) > 0
-        assert any("區域" in error for error in errors)
-
-    def test_validate_coordinates_valid(self):
-        """測試有效座標驗證"""
-        is_valid, errors = AddressValidator.validate_coordinates(120.2436, 23.0478)
-
-        assert is_valid is True
-        assert len(errors) == 0
-
-    def test_validate_coordinates_invalid_range(self):
-        """測試超出範圍的座標"""
-        is_valid, errors = AddressValidator.validate_coordinates(200.0, 50.0)
-
-        assert is_valid is False
-        assert len(errors) > 0
-        assert any("超出台灣範圍" in error for error in errors)
-
-    def test_validate_coordinates_none(self):
-        """測試空座標"""
-        is_valid, errors = AddressValidator.validate_coordinates(None, None)
-
-        assert is_valid is False
-        assert len(errors) > 0
-        assert any("座標資訊缺失" in error for error in errors)
+        assert_error_contains(errors, "區域")
+
+    @pytest.mark.parametrize(
+        "lng,lat,valid,substr",
+        [
+            (120.2436, 23.0478, True, None),
+            (200.0, 50.0, False, "超出台灣範圍"),
+            (None, None, False, "座標資訊缺失"),
+        ],
+        ids=["valid", "out_of_range", "none"],
+    )
+    def test_validate_coordinates(self, lng, lat, valid, substr):
+        """測試座標驗證"""
+        is_valid, errors = AddressValidator.validate_coordinates(lng, lat)
+
+        assert is_valid is valid
+        if substr:
+            assert_error_contains(errors, substr)
+        else:
+            assert len(errors) == 0
 
     def test_validate_address_list(self, sample_addresses, invalid_addresses):
         """測試地址列表驗證"""
-        all_addresses = sample_addresses + invalid_addresses
+        all_addresses = [*sample_addresses, *invalid_addresses]
         result = AddressValidator.validate_address_list(all_addresses)
 
         assert result["total"] == len(all_addresses)
@@ -79,41 +81,26 @@ class TestAddressValidator:
 class TestGroupingValidator:
     """分組驗證器測試"""
 
-    def test_validate_group_size_valid(self, sample_addresses):
-        """測試有效分組大小"""
-        is_valid, message = GroupingValidator.validate_group_size(
-            sample_addresses[:3], target_size=3, tolerance=0.3
-        )
-
-        assert is_valid is True
-        assert "合理" in message
-
-    def test_validate_group_size_too_small(self, sample_addresses):
-        """測試分組過小"""
+    @pytest.mark.parametrize(
+        "count,target_size,valid,substr",
+        [
+            (3, 3, True, "合理"),
+            (1, 5, False, "過小"),
+            (None, 2, False, "過大"),
+            (0, 3, False, "為空"),
+        ],
+        ids=["valid", "too_small", "too_large", "empty"],
+    )
+    def test_validate_group_size(
+        self, sample_addresses, count, target_size, valid, substr
+    ):
+        """測試分組大小驗證"""
         is_valid, message = GroupingValidator.validate_group_size(
-            sample_addresses[:1], target_size=5, tolerance=0.3
+            sample_addresses[:count], target_size=target_size, tolerance=0.3
         )
 
-        assert is_valid is False
-        assert "過小" in message
-
-    def test_validate_group_size_too_large(self, sample_addresses):
-        """測試分組過大"""
-        is_valid, message = GroupingValidator.validate_group_size(
-            sample_addresses, target_size=2, tolerance=0.3
-        )
-
-        assert is_valid is False
-        assert "過大" in message
-
-    def test_validate_empty_group(self):
-        """測試空分組"""
-        is_valid, message = GroupingValidator.validate_group_size(
-            [], target_size=3, tolerance=0.3
-        )
-
-        assert is_valid is False
-        assert "為空" in message
+        assert is_valid is valid
+        assert substr in message
 
     def test_validate_geographic_compactness(self, sample_addresses):
         """測試地理緊密度驗證"""
@@ -154,26 +141,54 @@ class TestDataQualityValidator:
         assert result["total"] == 0
         assert "completeness" in result
 
-    def test_detect_duplicates(self, sample_addresses):
+    def test_detect_duplicates(self, sample_addresses, duplicate_address):
         """測試重複檢測"""
-        # 建立重複地址
-        duplicate_addr = Address(
-            id=999,
-            district="安南區",
-            village="安慶里",
-            neighborhood=1,
-            x_coord=120.2436,  # 與第一個地址相同座標
-            y_coord=23.0478,
-            full_address="台南市安南區安慶里1鄰安中路一段100號",  # 相同地址
-        )
-
-        addresses_with_duplicates = sample_addresses + [duplicate_addr]
+        addresses_with_duplicates = [*sample_addresses, duplicate_address]
         result = DataQualityValidator.detect_duplicates(addresses_with_duplicates)
 
         assert "address_duplicates" in result
         assert "coordinate_duplicates" in result
         assert "total_duplicate_groups" in result
 
+    def test_detect_coordinate_duplicates_transitive(self):
+        """測試座標重複具遞移性（A~B、B~C 視為同一群）"""
+        addresses = [
+            Address(
+                id=i,
+                district="安南區",
+                village="安慶里",
+                neighborhood=1,
+                x_coord=x,
+                y_coord=23.0478,
+                full_address=f"台南市安南區安慶里1鄰安中路一段{i}號",
+            )
+            for i, x in enumerate([120.24360, 120.24366, 120.24372, 120.2500], 1)
+        ]
+
+        result = DataQualityValidator.detect_duplicates(addresses)
+
+        assert result["coordinate_duplicates"] == [[1, 2, 3]]
+
+    def test_detect_coordinate_duplicates_near_threshold(self):
+        """測試距離略小於 10 公尺且跨越網格邊界的座標仍視為重複"""
+        addresses = [
+            Address(
+                id=i,
+                district="安南區",
+                village="安慶里",
+                neighborhood=1,
+                x_coord=120.2436,
+                y_coord=y,
+                full_address=f"台南市安南區安慶里1鄰安中路一段{i}號",
+            )
+            for i, y in enumerate([23.049946092336285, 23.050035979530797], 1)
+        ]
+        assert 9.99 < addresses[0].distance_to(addresses[1]) < 10.0
+
+        result = DataQualityValidator.detect_duplicates(addresses)
+
+        assert result["coordinate_duplicates"] == [[1, 2]]
+
     def test_validate_address_format_valid(self):
         """測試有效地址格式"""
         is_valid, suggestions = DataQualityValidator.validate_address_format(
@@ -196,71 +211,43 @@ class TestDataQualityValidator:
 
         assert is_valid is False
         assert len(suggestions) > 0
-        assert any("過短" in suggestion for suggestion in suggestions)
+        assert_error_contains(suggestions, "過短")
 
 
 class TestInputParametersValidator:
     """輸入參數驗證器測試"""
 
-    def test_validate_valid_parameters(self):
-        """測試有效參數"""
-        is_valid, errors = validate_input_parameters("安南區", "安慶里", 35)
-
-        assert is_valid is True
-        assert len(errors) == 0
-
-    def test_validate_empty_district(self):
-        """測試空區域"""
-        is_valid, errors = validate_input_parameters("", "安慶里", 35)
-
-        assert is_valid is False
-        assert any("區域名稱不能為空" in error for error in errors)
-
-    def test_validate_empty_village(self):
-        """測試空村里"""
-        is_valid, errors = validate_input_parameters("安南區", "", 35)
-
-        assert is_valid is False
-        assert any("村里名稱不能為空" in error for error in errors)
-
-    def test_validate_invalid_target_size_zero(self):
-        """測試無效目標大小（零）"""
-        is_valid, errors = validate_input_parameters("安南區", "安慶里", 0)
-
-        assert is_valid is False
-        assert any("正整數" in error for error in errors)
-
-    def test_validate_invalid_target_size_negative(self):
-        """測試無效目標大小（負數）"""
-        is_valid, errors = validate_input_parameters("安南區", "安慶里", -5)
-
-        assert is_valid is False
-        assert any("正整數" in error for error in errors)
-
-    def test_validate_target_size_too_large(self):
-        """測試目標大小過大"""
-        is_valid, errors = validate_input_parameters("安南區", "安慶里", 150)
-
-        assert is_valid is False
-        assert any("過大" in error for error in errors)
-
-    def test_validate_target_size_too_small(self):
-        """測試目標大小過小"""
-        is_valid, errors = validate_input_parameters("安南區", "安慶里", 2)
-
-        assert is_valid is False
-        assert any("過小" in error for error in errors)
-
-    def test_validate_invalid_district_format(self):
-        """測試無效區域格式"""
-        is_valid, errors = validate_input_parameters("無效區域", "安慶里", 35)
-
-        assert is_valid is False
-        assert any("格式不正確" in error for error in errors)
-
-    def test_validate_invalid_village_format(self):
-        """測試無效村里格式"""
-        is_valid, errors = validate_input_parameters("安南區", "無效村里", 35)
-
-        assert is_valid is False
-        assert any("格式不正確" in error for error in errors)
+    @pytest.mark.parametrize(
+        "district,village,size,valid,substr",
+        [
+            ("安南區", "安慶里", 35, True, None),
+            ("", "安慶里", 35, False, "區域名稱不能為空"),
+            ("安南區", "", 35, False, "村里名稱不能為空"),
+            ("安南區", "安慶里", 0, False, "正整數"),
+            ("安南區", "安慶里", -5, False, "正整數"),
+            ("安南區", "安慶里", 150, False, "過大"),
+            ("安南區", "安慶里", 2, False, "過小"),
+            ("無效區域", "安慶里", 35, False, "格式不正確"),
+            ("安南區", "無效村里", 35, False, "格式不正確"),
+        ],
+        ids=[
+            "valid",
+            "empty_district",
+            "empty_village",
+            "target_size_zero",
+            "target_size_negative",
+            "target_size_too_large",
+            "target_size_too_small",
+            "invalid_district_format",
+            "invalid_village_format",
+        ],
+    )
+    def test_validate_input_parameters(self, district, village, size, valid, substr):
+        """測試輸入參數驗證"""
+        is_valid, errors = validate_input_parameters(district, village, size)
+
+        assert is_valid is valid
+        if substr:
+            assert_error_contains(errors, substr)
+        else:
+            assert len(errors) == 0
@@ -2,11 +2,14 @@
 Tests for VillageProcessor
 """
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-from pathlib import Path
+from contextlib import ExitStack
+from functools import reduce
+from unittest.mock import patch
 import pandas as pd
-import tempfile
-import os
+import codecs
+import csv
+import io
+from types import MappingProxyType, SimpleNamespace
 
 from survey_grouping.processors.village_processor import (
     VillageProcessor,
@@ -15,47 +18,192 @@ from survey_grouping.processors.village_processor import (
 )
 
 
+@pytest.fixture
+def pandas_excel_mocks():
+    """Patch pandas.ExcelFile and pandas.read_excel for the duration of a test"""
+    with ExitStack() as stack:
+        yield (
+            stack.enter_context(patch('pandas.ExcelFile')),
+            stack.enter_context(patch('pandas.read_excel')),
+        )
+
+
+@pytest.fixture(scope="module")
+def roster_frames():
+    """Roster-format sheets shared by the roster tests
+
+    The roster reader only slices copies of the sheet, so the frames are
+    built once per module; tests must not modify them.
+    """
+    return {
+        "basic": pd.DataFrame([
+            ["臺南市七股區七股里 名冊", None, None, None],
+            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
+            [None, None, None, None],
+            [1, "臺南市七股區七股里", "吳孟淵", "臺南市七股區七股里13鄰七股123號之12"],
+            [2, "臺南市七股區七股里", "王明洲", "臺南市七股區七股里8鄰七股74號之1"],
+        ]),
+        "fullwidth": pd.DataFrame([
+            ["臺南市七股區七股里 名冊", None, None, None],
+            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
+            [None, None, None, None],
+            [1, "臺南市七股區七股里", "測試人員", "臺南市七股區七股里１３鄰七股１２３號之１２"],
+        ]),
+        "cross_district": pd.DataFrame([
+            ["臺南市七股區七股里 名冊", None, None, None],
+            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
+            [None, None, None, None],
+            [1, "臺南市七股區七股里", "有效地址", "臺南市七股區七股里13鄰七股123號"],
+            [2, "臺南市七股區七股里", "跨區地址", "臺南市七股區塩埕里6鄰鹽埕237號之3"],
+            [3, "臺南市七股區七股里", "跨區地址2", "臺南市七股區七股116號之19"],
+        ]),
+        "comprehensive": pd.DataFrame([
+            ["臺南市七股區七股里 名冊", None, None, None],
+            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
+            [None, None, None, None],
+            [1, "臺南市七股區七股里", "吳孟淵", "臺南市七股區七股里13鄰七股123號之12"],
+            [6, "臺南市七股區七股里", "王明洲", "臺南市七股區七股里8鄰七股74-1號"],  # Critical test case
+            [30, "臺南市七股區七股里", "黃文騫", "臺南市七股區塩埕里6鄰鹽埕237號之3"],  # Cross-district
+            [33, "臺南市七股區七股里", "黃明通", "臺南市七股區七股里7鄰5-2號"],  # Should be unmatched
+        ]),
+        "cross_village": pd.DataFrame([
+            ["臺南市七股區七股里 名冊", None, None, None],
+            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
+            [None, None, None, None],
+            [1, "臺南市七股區七股里", "本里住戶", "臺南市七股區七股里13鄰七股123號"],
+            [2, "臺南市七股區七股里", "跨村里住戶", "臺南市七股區塩埕里6鄰鹽埕237號之3"],
+            [3, "臺南市七股區七股里", "跨區住戶", "臺南市安南區七股116號之19"],
+        ]),
+        "cross_village_only": pd.DataFrame([
+            ["臺南市七股區七股里 名冊", None, None, None],
+            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
+            [None, None, None, None],
+            [1, "臺南市七股區七股里", "本里住戶", "臺南市七股區七股里13鄰七股123號"],
+            [2, "臺南市七股區七股里", "跨村里住戶", "臺南市七股區塩埕里6鄰鹽埕237號之3"],
+        ]),
+        "six_columns": pd.DataFrame([
+            ["臺南市七股區十份里 名冊", None, None, None, None, None],
+            ["編號", "鄉鎮市區村里", "姓名", "通訊地址", "額外欄1", "額外欄2"],
+            [None, None, None, None, None, None],
+            [1, "臺南市七股區十份里", "測試住戶", "臺南市七股區十份里17鄰十份36號之28", "extra1", "extra2"],
+        ]),
+        "cross_village_workflow": pd.DataFrame([
+            ["臺南市七股區七股里 名冊", None, None, None],
+            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
+            [None, None, None, None],
+            [26, "臺南市七股區七股里", "曾榮裕", "臺南市七股區七股里2鄰七股22號之4"],
+            [30, "臺南市七股區七股里", "黃文騫", "臺南市七股區塩埕里6鄰鹽埕237號之3"],  # Cross-village
+            [33, "臺南市七股區七股里", "黃明通", "臺南市七股區七股里7鄰5-2號"],  # Incomplete address
+            [34, "臺南市七股區七股里", "吳國民", "臺南市七股區七股116號之19"],  # Incomplete address
+        ]),
+    }
+
+
+@pytest.fixture(scope="module")
+def excel_workbooks(roster_frames):
+    """In-memory .xlsx workbooks, keyed by scenario, for tests that read through pandas"""
+    sheets = {
+        "single_sheet": ("鹽水區", pd.DataFrame([
+            {"編號": 1, "行政區": "鹽水區", "里": "文昌里", "鄰": 11, "地址": "羊稠厝22號", "姓名": "邱樹"},
+            {"編號": 2, "行政區": "鹽水區", "里": "文昌里", "鄰": 6, "地址": "番子寮2號", "姓名": "蔡澄山"},
+        ])),
+        "multi_sheet": ("第一鄰", pd.DataFrame([
+            {"col1": "序號", "col2": "姓名", "col3": "地址"},
+            {"col1": "1", "col2": "陳金鐘", "col3": "頂山2號之3"},
+        ])),
+        "six_columns": ("十份里", roster_frames["six_columns"]),
+        "cross_village_workflow": ("七股里", roster_frames["cross_village_workflow"]),
+    }
+    workbooks = {}
+    for key, (sheet_name, df) in sheets.items():
+        buf = io.BytesIO()
+        df.to_excel(buf, sheet_name=sheet_name, index=False, engine="openpyxl")
+        workbooks[key] = buf.getvalue()
+    return workbooks
+
+
+@pytest.fixture(scope="module")
+def cross_village_sample():
+    """Cross-village records as read_excel_data leaves them on the processor
+
+    process_data only reads these records, so they are built once per module
+    as read-only mappings.
+    """
+    return (
+        MappingProxyType({
+            "serial_number": "2",
+            "name": "跨村里住戶",
+            "original_address": "臺南市七股區塩埕里6鄰鹽埕237號之3",
+            "standardized_address": "塩埕里鹽埕237號之3",
+            "neighborhood": 6,
+            "sheet_name": "七股里"
+        }),
+    )
+
+
+def _read_exported_csv(output_path):
+    """Read back an exported CSV as dict rows, or None if nothing was written
+
+    Exports must be UTF-8 with a BOM (utf-8-sig) so Excel shows Chinese correctly.
+    """
+    if not output_path.exists():
+        return None
+    raw = output_path.read_bytes()
+    assert raw.startswith(codecs.BOM_UTF8)
+    return list(csv.DictReader(io.StringIO(raw.decode('utf-8-sig'))))
+
+
+# Attribute chain of supabase.table(...).select(...).eq(...).eq(...).eq(...).execute()
+_QUERY_CHAIN = ("table", "select", "eq", "eq", "eq", "execute")
+
+
+def _query_result_setter(supabase):
+    """Walk the mocked query chain once and return a setter for its result data"""
+    execute = reduce(lambda m, attr: getattr(m, attr).return_value, _QUERY_CHAIN[:-1], supabase).execute
+
+    def _set(data):
+        # The response only needs a .data attribute, so skip building a Mock for it
+        execute.return_value = SimpleNamespace(data=data)
+    return _set
+
+
 class TestVillageProcessor:
     """Test cases for VillageProcessor"""
     
-    @pytest.fixture
-    def mock_supabase_response(self):
-        """Mock Supabase response for testing"""
-        def _response(data):
-            mock_response = Mock()
-            mock_response.data = data
-            return mock_response
-        return _response
-    
     @pytest.fixture
     def processor(self):
         """Create a VillageProcessor instance for testing"""
         with patch('survey_grouping.processors.village_processor.get_supabase_client'):
             return VillageProcessor("七股區", "頂山里")
+
+    @pytest.fixture
+    def supabase_chain(self, processor):
+        """Setter for the data returned by the mocked coordinate query"""
+        return _query_result_setter(processor.supabase)
     
-    def test_query_address_coordinates_exact_match(self, processor, mock_supabase_response):
+    def test_query_address_coordinates_exact_match(self, processor, supabase_chain):
         """Test exact address matching returns coordinates"""
         # Mock successful response
         mock_data = [{"x_coord": 120.112034, "y_coord": 23.180486}]
-        processor.supabase.table.return_value.select.return_value.eq.return_value.eq.return_value.eq.return_value.execute.return_value = mock_supabase_response(mock_data)
+        supabase_chain(mock_data)
         
         result = processor.query_address_coordinates("頂山13號")
         
         assert result == (120.112034, 23.180486)
     
-    def test_query_address_coordinates_no_match(self, processor, mock_supabase_response):
+    def test_query_address_coordinates_no_match(self, processor, supabase_chain):
         """Test address not found returns None"""
         # Mock empty response
-        processor.supabase.table.return_value.select.return_value.eq.return_value.eq.return_value.eq.return_value.execute.return_value = mock_supabase_response([])
+        supabase_chain([])
         
         result = processor.query_address_coordinates("頂山2號之3")
         
         assert result is None
     
-    def test_query_address_coordinates_no_fuzzy_matching(self, processor, mock_supabase_response):
+    def test_query_address_coordinates_no_fuzzy_matching(self, processor, supabase_chain):
         """Test that fuzzy matching is disabled"""
         # Mock empty response for exact match
-        processor.supabase.table.return_value.select.return_value.eq.return_value.eq.return_value.eq.return_value.execute.return_value = mock_supabase_response([])
+        supabase_chain([])
         
         result = processor.query_address_coordinates("頂山2號之3")
         
@@ -85,12 +233,10 @@ class TestVillageProcessor:
             }
         ]
         
-        def mock_query_coordinates(address):
-            if address == "頂山13號":
-                return (120.112034, 23.180486)
-            elif address == "頂山2號之3":
-                return None
-            return None
+        # 頂山2號之3 is intentionally absent so it stays unmatched
+        mock_query_coordinates = {
+            "頂山13號": (120.112034, 23.180486),
+        }.get
         
         with patch.object(processor, 'read_excel_data', return_value=mock_data), \
              patch.object(processor, 'query_address_coordinates', side_effect=mock_query_coordinates), \
@@ -118,203 +264,168 @@ class TestVillageProcessor:
             assert unmatched[0]["name"] == "陳金鐘"
             assert unmatched[0]["original_address"] == "頂山2號之3"
     
-    def test_export_unmatched_report(self, processor):
-        """Test unmatched address report generation"""
-        unmatched_data = [
-            {
-                "serial_number": "4",
-                "name": "陳金鐘",
-                "neighborhood": 1,
-                "original_address": "頂山里2-3號",
-                "standardized_address": "頂山2號之3"
-            }
-        ]
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-        
-        try:
-            processor.export_unmatched_report(unmatched_data, tmp_path)
-            
-            # Verify file was created
-            assert os.path.exists(tmp_path)
-            
-            # Read and verify content
-            df = pd.read_csv(tmp_path, encoding='utf-8-sig')
-            assert len(df) == 1
-            assert list(df.columns) == ["序號", "姓名", "鄰別", "原始地址", "標準化地址"]
-            assert df.iloc[0]["序號"] == 4
-            assert df.iloc[0]["姓名"] == "陳金鐘"
-            assert df.iloc[0]["原始地址"] == "頂山里2-3號"
-            assert df.iloc[0]["標準化地址"] == "頂山2號之3"
-            
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-    
-    def test_export_unmatched_report_empty(self, processor):
-        """Test unmatched report with no unmatched addresses"""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-        
-        try:
-            processor.export_unmatched_report([], tmp_path)
-            
-            # Should not create file for empty data
-            # (based on the implementation that skips export when no unmatched addresses)
-            
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-    
-    def test_single_sheet_format_detection(self, mock_supabase_response):
+    @pytest.mark.parametrize("method,data,expected", [
+        pytest.param(
+            "export_unmatched_report",
+            [
+                {
+                    "serial_number": "4",
+                    "name": "陳金鐘",
+                    "neighborhood": 1,
+                    "original_address": "頂山里2-3號",
+                    "standardized_address": "頂山2號之3"
+                }
+            ],
+            [
+                {"序號": "4", "姓名": "陳金鐘", "鄰別": "1", "原始地址": "頂山里2-3號", "標準化地址": "頂山2號之3"},
+            ],
+            id="unmatched_report",
+        ),
+        # Nothing is written when there are no unmatched addresses
+        pytest.param("export_unmatched_report", [], None, id="unmatched_report_empty"),
+        pytest.param(
+            "export_to_csv",
+            [
+                {
+                    "serial_number": "13",
+                    "name": "吳靜媚",
+                    "full_address": "頂山13號",
+                    "district": "七股區", 
+                    "village": "頂山里",
+                    "neighborhood": 1,
+                    "longitude": 120.112034,
+                    "latitude": 23.180486
+                },
+                {
+                    "serial_number": "4", 
+                    "name": "陳金鐘",
+                    "full_address": "頂山2號之3",
+                    "district": "七股區",
+                    "village": "頂山里", 
+                    "neighborhood": 1,
+                    "longitude": None,
+                    "latitude": None
+                }
+            ],
+            # The unmatched item has empty coordinates
+            [
+                {"序號": "13", "姓名": "吳靜媚", "完整地址": "頂山13號", "區域": "七股區", "村里": "頂山里",
+                 "鄰別": "1", "經度": "120.112034", "緯度": "23.180486"},
+                {"序號": "4", "姓名": "陳金鐘", "完整地址": "頂山2號之3", "區域": "七股區", "村里": "頂山里",
+                 "鄰別": "1", "經度": "", "緯度": ""},
+            ],
+            id="csv_with_none_coordinates",
+        ),
+        pytest.param(
+            "export_cross_village_addresses",
+            [
+                {
+                    "serial_number": "2",
+                    "name": "跨村里住戶1",
+                    "full_address": "塩埕里鹽埕237號之3",
+                    "district": "七股區",
+                    "village": "塩埕里",
+                    "neighborhood": 6,
+                    "longitude": 120.123456,
+                    "latitude": 23.654321,
+                },
+                {
+                    "serial_number": "3",
+                    "name": "跨村里住戶2",
+                    "full_address": "樹林里樹林45號",
+                    "district": "七股區",
+                    "village": "樹林里",
+                    "neighborhood": 5,
+                    "longitude": None,
+                    "latitude": None,
+                }
+            ],
+            # The second row has no coordinates
+            [
+                {"序號": "2", "姓名": "跨村里住戶1", "完整地址": "塩埕里鹽埕237號之3", "區域": "七股區", "村里": "塩埕里",
+                 "鄰別": "6", "經度": "120.123456", "緯度": "23.654321"},
+                {"序號": "3", "姓名": "跨村里住戶2", "完整地址": "樹林里樹林45號", "區域": "七股區", "村里": "樹林里",
+                 "鄰別": "5", "經度": "", "緯度": ""},
+            ],
+            id="cross_village_addresses",
+        ),
+        # Nothing is written when there are no cross-village addresses
+        pytest.param("export_cross_village_addresses", [], None, id="cross_village_addresses_empty"),
+    ])
+    def test_export_reports(self, processor, method, data, expected, tmp_path):
+        """Test CSV report exports write the expected rows, or nothing for empty data"""
+        output_path = tmp_path / 'output.csv'
+        getattr(processor, method)(data, str(output_path))
+        rows = _read_exported_csv(output_path)
+        
+        assert rows == expected
+        if expected:
+            # Dict equality ignores key order, so check the header order too
+            assert list(rows[0]) == list(expected[0])
+    
+    def test_single_sheet_format_detection(self, excel_workbooks):
         """Test automatic detection of single sheet format"""
         # Create processor for matching data
         with patch('survey_grouping.processors.village_processor.get_supabase_client'):
             processor = VillageProcessor("鹽水區", "文昌里")
         
-        # Mock Excel file with single sheet format
-        single_sheet_data = pd.DataFrame([
-            {"編號": 1, "行政區": "鹽水區", "里": "文昌里", "鄰": 11, "地址": "羊稠厝22號", "姓名": "邱樹"},
-            {"編號": 2, "行政區": "鹽水區", "里": "文昌里", "鄰": 6, "地址": "番子寮2號", "姓名": "蔡澄山"},
-        ])
+        # Test that it detects single sheet format automatically
+        data = processor.read_excel_data(io.BytesIO(excel_workbooks["single_sheet"]))
         
-        with patch('pandas.ExcelFile') as mock_excel_file, \
-             patch('pandas.read_excel') as mock_read_excel:
-            
-            # Mock ExcelFile
-            mock_excel_file.return_value.sheet_names = ["鹽水區"]
-            
-            # Mock read_excel calls
-            mock_read_excel.return_value = single_sheet_data
-            
-            # Test that it detects single sheet format automatically
-            data = processor.read_excel_data("dummy_path.xlsx")
-            
-            # Should have called read_excel twice (once for detection, once for processing)
-            assert mock_read_excel.call_count == 2
-            
-            # Should return data in correct format
-            assert len(data) == 2
-            assert data[0]["neighborhood"] == 11
-            assert data[0]["original_address"] == "羊稠厝22號"
-            assert data[1]["neighborhood"] == 6
-            assert data[1]["original_address"] == "番子寮2號"
+        # Should return data in correct format
+        assert len(data) == 2
+        assert data[0]["neighborhood"] == 11
+        assert data[0]["original_address"] == "羊稠厝22號"
+        assert data[1]["neighborhood"] == 6
+        assert data[1]["original_address"] == "番子寮2號"
 
-    def test_multi_sheet_format_with_mapping(self, processor, mock_supabase_response):
+    def test_multi_sheet_format_with_mapping(self, processor, excel_workbooks):
         """Test multi-sheet format still works with neighborhood_mapping"""
-        # Mock Excel file with multi-sheet format
-        multi_sheet_data = pd.DataFrame([
-            {"col1": "序號", "col2": "姓名", "col3": "地址"},
-            {"col1": "1", "col2": "陳金鐘", "col3": "頂山2號之3"},
-        ])
-        
         neighborhood_mapping = {"第一鄰": 1}
         
-        with patch('pandas.ExcelFile') as mock_excel_file, \
-             patch('pandas.read_excel') as mock_read_excel:
-            
-            # Mock ExcelFile
-            mock_excel_file.return_value.sheet_names = ["第一鄰"]
-            
-            # Mock read_excel calls - first call has no '鄰' column
-            mock_read_excel.return_value = multi_sheet_data
-            
-            # Test with neighborhood_mapping provided
-            data = processor.read_excel_data("dummy_path.xlsx", neighborhood_mapping)
-            
-            # Should process as multi-sheet format
-            assert len(data) == 1
-            assert data[0]["neighborhood"] == 1
-            assert data[0]["original_address"] == "頂山2號之3"
-
-    def test_export_to_csv_with_none_coordinates(self, processor):
-        """Test CSV export handles None coordinates correctly"""
-        processed_data = [
-            {
-                "serial_number": "13",
-                "name": "吳靜媚",
-                "full_address": "頂山13號",
-                "district": "七股區", 
-                "village": "頂山里",
-                "neighborhood": 1,
-                "longitude": 120.112034,
-                "latitude": 23.180486
-            },
-            {
-                "serial_number": "4", 
-                "name": "陳金鐘",
-                "full_address": "頂山2號之3",
-                "district": "七股區",
-                "village": "頂山里", 
-                "neighborhood": 1,
-                "longitude": None,
-                "latitude": None
-            }
-        ]
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
+        # Test with neighborhood_mapping provided
+        data = processor.read_excel_data(io.BytesIO(excel_workbooks["multi_sheet"]), neighborhood_mapping)
         
-        try:
-            processor.export_to_csv(processed_data, tmp_path)
-            
-            # Verify file was created
-            assert os.path.exists(tmp_path)
-            
-            # Read and verify content
-            df = pd.read_csv(tmp_path, encoding='utf-8-sig')
-            assert len(df) == 2
-            
-            # Check matched item
-            matched_row = df[df["姓名"] == "吳靜媚"].iloc[0]
-            assert matched_row["經度"] == 120.112034
-            assert matched_row["緯度"] == 23.180486
-            
-            # Check unmatched item (should have empty coordinates)
-            unmatched_row = df[df["姓名"] == "陳金鐘"].iloc[0]
-            assert pd.isna(unmatched_row["經度"])
-            assert pd.isna(unmatched_row["緯度"])
-            
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
+        # Should process as multi-sheet format
+        assert len(data) == 1
+        assert data[0]["neighborhood"] == 1
+        assert data[0]["original_address"] == "頂山2號之3"
 
 
 class TestUtilityFunctions:
     """Test cases for utility functions"""
     
-    def test_convert_fullwidth_to_halfwidth(self):
+    @pytest.mark.parametrize("inp,expected", [
+        # Full-width numbers
+        ("１２３４５", "12345"),
+        ("６７８９０", "67890"),
+        # Mixed content
+        ("臺南市七股區七股里１３鄰七股１２３－１２號", "臺南市七股區七股里13鄰七股123－12號"),
+        # No full-width numbers
+        ("七股123號", "七股123號"),
+        # Empty input
+        ("", ""),
+        (None, None),
+    ])
+    def test_convert_fullwidth_to_halfwidth(self, inp, expected):
         """Test full-width to half-width number conversion"""
-        # Test full-width numbers
-        assert convert_fullwidth_to_halfwidth("１２３４５") == "12345"
-        assert convert_fullwidth_to_halfwidth("６７８９０") == "67890"
-        
-        # Test mixed content
-        assert convert_fullwidth_to_halfwidth("臺南市七股區七股里１３鄰七股１２３－１２號") == "臺南市七股區七股里13鄰七股123－12號"
-        
-        # Test no full-width numbers
-        assert convert_fullwidth_to_halfwidth("七股123號") == "七股123號"
-        
-        # Test empty string
-        assert convert_fullwidth_to_halfwidth("") == ""
-        assert convert_fullwidth_to_halfwidth(None) is None
-    
-    def test_extract_neighborhood_from_address(self):
+        assert convert_fullwidth_to_halfwidth(inp) == expected
+    
+    @pytest.mark.parametrize("address,expected", [
+        # Normal cases
+        ("臺南市七股區七股里13鄰七股123號", 13),
+        ("臺南市七股區七股里1鄰七股74號之1", 1),
+        ("臺南市七股區七股里8鄰七股145號", 8),
+        # Edge cases
+        ("七股123號", None),
+        ("", None),
+        (None, None),
+        # Full-width numbers
+        ("臺南市七股區七股里１３鄰七股123號", 13),
+    ])
+    def test_extract_neighborhood_from_address(self, address, expected):
         """Test neighborhood extraction from full address"""
-        # Test normal cases
-        assert extract_neighborhood_from_address("臺南市七股區七股里13鄰七股123號") == 13
-        assert extract_neighborhood_from_address("臺南市七股區七股里1鄰七股74號之1") == 1
-        assert extract_neighborhood_from_address("臺南市七股區七股里8鄰七股145號") == 8
-        
-        # Test edge cases
-        assert extract_neighborhood_from_address("七股123號") is None
-        assert extract_neighborhood_from_address("") is None
-        assert extract_neighborhood_from_address(None) is None
-        
-        # Test with full-width numbers
-        assert extract_neighborhood_from_address("臺南市七股區七股里１３鄰七股123號") == 13
-
+        assert extract_neighborhood_from_address(address) == expected
 
 class TestRosterFormatProcessing:
     """Test cases for roster format processing"""
@@ -325,91 +436,70 @@ class TestRosterFormatProcessing:
         with patch('survey_grouping.processors.village_processor.get_supabase_client'):
             return VillageProcessor("七股區", "七股里")
     
-    def test_roster_format_detection(self, processor):
+    def test_roster_format_detection(self, roster_frames, processor, pandas_excel_mocks):
         """Test automatic detection of roster format"""
         # Mock roster format data
-        roster_data = pd.DataFrame([
-            ["臺南市七股區七股里 名冊", None, None, None],
-            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
-            [None, None, None, None],
-            [1, "臺南市七股區七股里", "吳孟淵", "臺南市七股區七股里13鄰七股123號之12"],
-            [2, "臺南市七股區七股里", "王明洲", "臺南市七股區七股里8鄰七股74號之1"],
-        ])
+        roster_data = roster_frames["basic"]
         
-        with patch('pandas.ExcelFile') as mock_excel_file, \
-             patch('pandas.read_excel') as mock_read_excel:
-            
-            # Mock ExcelFile
-            mock_excel_file.return_value.sheet_names = ["七股里"]
-            
-            # Mock read_excel calls
-            mock_read_excel.return_value = roster_data
-            
-            # Test that it detects roster format automatically
-            data = processor.read_excel_data("dummy_path.xlsx")
-            
-            # Should detect roster format and process data
-            assert len(data) == 2
-            assert data[0]["name"] == "吳孟淵"
-            assert data[0]["neighborhood"] == 13
-            assert data[0]["standardized_address"] == "七股123號之12"
-            assert data[1]["name"] == "王明洲"
-            assert data[1]["neighborhood"] == 8
-            assert data[1]["standardized_address"] == "七股74號之1"
+        mock_excel_file, mock_read_excel = pandas_excel_mocks
+        
+        # Mock ExcelFile
+        mock_excel_file.return_value.sheet_names = ["七股里"]
+        
+        # Mock read_excel calls
+        mock_read_excel.return_value = roster_data
+        
+        # Test that it detects roster format automatically
+        data = processor.read_excel_data("dummy_path.xlsx")
+        
+        # Should detect roster format and process data
+        assert len(data) == 2
+        assert data[0]["name"] == "吳孟淵"
+        assert data[0]["neighborhood"] == 13
+        assert data[0]["standardized_address"] == "七股123號之12"
+        assert data[1]["name"] == "王明洲"
+        assert data[1]["neighborhood"] == 8
+        assert data[1]["standardized_address"] == "七股74號之1"
     
-    def test_roster_format_with_fullwidth_numbers(self, processor):
+    def test_roster_format_with_fullwidth_numbers(self, roster_frames, processor, pandas_excel_mocks):
         """Test roster format with full-width numbers"""
         # Mock roster data with full-width numbers
-        roster_data = pd.DataFrame([
-            ["臺南市七股區七股里 名冊", None, None, None],
-            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
-            [None, None, None, None],
-            [1, "臺南市七股區七股里", "測試人員", "臺南市七股區七股里１３鄰七股１２３號之１２"],
-        ])
+        roster_data = roster_frames["fullwidth"]
         
-        with patch('pandas.ExcelFile') as mock_excel_file, \
-             patch('pandas.read_excel') as mock_read_excel:
-            
-            mock_excel_file.return_value.sheet_names = ["七股里"]
-            mock_read_excel.return_value = roster_data
-            
-            data = processor.read_excel_data("dummy_path.xlsx")
-            
-            assert len(data) == 1
-            assert data[0]["name"] == "測試人員"
-            assert data[0]["neighborhood"] == 13
-            assert data[0]["standardized_address"] == "七股123號之12"
+        mock_excel_file, mock_read_excel = pandas_excel_mocks
+        
+        mock_excel_file.return_value.sheet_names = ["七股里"]
+        mock_read_excel.return_value = roster_data
+        
+        data = processor.read_excel_data("dummy_path.xlsx")
+        
+        assert len(data) == 1
+        assert data[0]["name"] == "測試人員"
+        assert data[0]["neighborhood"] == 13
+        assert data[0]["standardized_address"] == "七股123號之12"
     
-    def test_roster_format_cross_district_filtering(self, processor):
+    def test_roster_format_cross_district_filtering(self, roster_frames, processor, pandas_excel_mocks):
         """Test roster format filters out cross-district addresses"""
         # Mock roster data with cross-district addresses
-        roster_data = pd.DataFrame([
-            ["臺南市七股區七股里 名冊", None, None, None],
-            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
-            [None, None, None, None],
-            [1, "臺南市七股區七股里", "有效地址", "臺南市七股區七股里13鄰七股123號"],
-            [2, "臺南市七股區七股里", "跨區地址", "臺南市七股區塩埕里6鄰鹽埕237號之3"],
-            [3, "臺南市七股區七股里", "跨區地址2", "臺南市七股區七股116號之19"],
-        ])
+        roster_data = roster_frames["cross_district"]
         
-        with patch('pandas.ExcelFile') as mock_excel_file, \
-             patch('pandas.read_excel') as mock_read_excel:
-            
-            mock_excel_file.return_value.sheet_names = ["七股里"]
-            mock_read_excel.return_value = roster_data
-            
-            data = processor.read_excel_data("dummy_path.xlsx")
-            
-            # Should only include valid addresses for the target district and village
-            assert len(data) == 1
-            assert data[0]["name"] == "有效地址"
-            assert data[0]["standardized_address"] == "七股123號"
-            
-            # Should have recorded invalid addresses
-            assert hasattr(processor, 'invalid_addresses')
-            assert len(processor.invalid_addresses) == 2
-            assert processor.invalid_addresses[0]["name"] == "跨區地址"
-            assert processor.invalid_addresses[1]["name"] == "跨區地址2"
+        mock_excel_file, mock_read_excel = pandas_excel_mocks
+        
+        mock_excel_file.return_value.sheet_names = ["七股里"]
+        mock_read_excel.return_value = roster_data
+        
+        data = processor.read_excel_data("dummy_path.xlsx")
+        
+        # Should only include valid addresses for the target district and village
+        assert len(data) == 1
+        assert data[0]["name"] == "有效地址"
+        assert data[0]["standardized_address"] == "七股123號"
+        
+        # Should have recorded invalid addresses
+        assert hasattr(processor, 'invalid_addresses')
+        assert len(processor.invalid_addresses) == 2
+        assert processor.invalid_addresses[0]["name"] == "跨區地址"
+        assert processor.invalid_addresses[1]["name"] == "跨區地址2"
     
     def test_standardize_roster_address_dash_to_zhi_conversion(self, processor):
         """Test critical dash-to-zhi conversion in roster format"""
@@ -431,7 +521,7 @@ class TestRosterFormatProcessing:
             result = processor._standardize_roster_address(input_addr)
             assert result == expected, f"Failed for {input_addr}: got {result}, expected {expected}"
     
-    def test_export_invalid_addresses_report(self, processor):
+    def test_export_invalid_addresses_report(self, processor, tmp_path):
         """Test invalid addresses report generation"""
         # Set up invalid addresses
         processor.invalid_addresses = [
@@ -449,69 +539,41 @@ class TestRosterFormatProcessing:
             }
         ]
         
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
+        output_path = tmp_path / 'output.csv'
+        processor.export_invalid_addresses(str(output_path))
+        rows = _read_exported_csv(output_path)
         
-        try:
-            processor.export_invalid_addresses(tmp_path)
-            
-            # Verify file was created
-            assert os.path.exists(tmp_path)
-            
-            # Read and verify content
-            df = pd.read_csv(tmp_path, encoding='utf-8-sig')
-            assert len(df) == 2
-            assert list(df.columns) == ["序號", "姓名", "原始地址", "問題原因"]
-            assert df.iloc[0]["序號"] == 30  # CSV reading converts to int
-            assert df.iloc[0]["姓名"] == "黃文騫"
-            assert df.iloc[0]["問題原因"] == "非七股區七股里地址"
-            
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
+        # Verify CSV was written with the expected rows
+        assert rows is not None
+        assert list(rows[0]) == ["序號", "姓名", "原始地址", "問題原因"]
+        assert rows == [
+            {"序號": "30", "姓名": "黃文騫", "原始地址": "臺南市七股區塩埕里6鄰鹽埕237號之3", "問題原因": "非七股區七股里地址"},
+            {"序號": "34", "姓名": "吳國民", "原始地址": "臺南市七股區七股116號之19", "問題原因": "非七股區七股里地址"},
+        ]
     
-    def test_export_invalid_addresses_empty(self, processor):
+    def test_export_invalid_addresses_empty(self, processor, tmp_path):
         """Test invalid addresses export with no invalid addresses"""
         # No invalid addresses set
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-        
-        try:
-            processor.export_invalid_addresses(tmp_path)
-            
-            # Should not create file or should handle gracefully
-            # (based on the implementation that logs info when no invalid addresses)
-            
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-    
-    def test_roster_format_comprehensive_workflow(self, processor):
+        output_path = tmp_path / 'output.csv'
+        processor.export_invalid_addresses(str(output_path))
+        rows = _read_exported_csv(output_path)
+        # Should not create file or should handle gracefully
+        # (based on the implementation that logs info when no invalid addresses)
+        assert rows is None
+    
+    def test_roster_format_comprehensive_workflow(self, roster_frames, processor, pandas_excel_mocks):
         """Test complete workflow with roster format including critical fixes"""
         # Mock comprehensive roster data
-        roster_data = pd.DataFrame([
-            ["臺南市七股區七股里 名冊", None, None, None],
-            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
-            [None, None, None, None],
-            [1, "臺南市七股區七股里", "吳孟淵", "臺南市七股區七股里13鄰七股123號之12"],
-            [6, "臺南市七股區七股里", "王明洲", "臺南市七股區七股里8鄰七股74-1號"],  # Critical test case
-            [30, "臺南市七股區七股里", "黃文騫", "臺南市七股區塩埕里6鄰鹽埕237號之3"],  # Cross-district
-            [33, "臺南市七股區七股里", "黃明通", "臺南市七股區七股里7鄰5-2號"],  # Should be unmatched
-        ])
-        
-        def mock_query_coordinates(address):
-            """Mock coordinate query with specific responses"""
-            if address == "七股123號之12":
-                return (120.130496, 23.135225)
-            elif address == "七股74號之1":  # This should work after fix
-                return (120.128619, 23.133989)
-            elif address == "5號之2":  # This should not match
-                return None
-            return None
-        
-        with patch('pandas.ExcelFile') as mock_excel_file, \
-             patch('pandas.read_excel') as mock_read_excel, \
-             patch.object(processor, 'query_address_coordinates', side_effect=mock_query_coordinates):
+        roster_data = roster_frames["comprehensive"]
+        
+        # 5號之2 is intentionally absent so it stays unmatched
+        mock_query_coordinates = {
+            "七股123號之12": (120.130496, 23.135225),
+            "七股74號之1": (120.128619, 23.133989),  # This should work after fix
+        }.get
+        
+        mock_excel_file, mock_read_excel = pandas_excel_mocks
+        with patch.object(processor, 'query_address_coordinates', side_effect=mock_query_coordinates):
             
             mock_excel_file.return_value.sheet_names = ["七股里"]
             mock_read_excel.return_value = roster_data
@@ -553,6 +615,11 @@ class TestCrossVillageProcessing:
         """Create a VillageProcessor instance with cross-village disabled (default)"""
         with patch('survey_grouping.processors.village_processor.get_supabase_client'):
             return VillageProcessor("七股區", "七股里", include_cross_village=False)
+
+    @pytest.fixture
+    def supabase_chain(self, processor_with_cross_village):
+        """Setter for the data returned by the mocked coordinate query"""
+        return _query_result_setter(processor_with_cross_village.supabase)
     
     def test_cross_village_parameter_initialization(self):
         """Test that include_cross_village parameter is properly initialized"""
@@ -569,72 +636,57 @@ class TestCrossVillageProcessing:
             processor_true = VillageProcessor("七股區", "七股里", include_cross_village=True)
             assert processor_true.include_cross_village is True
     
-    def test_cross_village_address_detection_enabled(self, processor_with_cross_village):
+    def test_cross_village_address_detection_enabled(self, roster_frames, processor_with_cross_village, pandas_excel_mocks):
         """Test cross-village address detection when enabled"""
         # Mock roster data with cross-village addresses
-        roster_data = pd.DataFrame([
-            ["臺南市七股區七股里 名冊", None, None, None],
-            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
-            [None, None, None, None],
-            [1, "臺南市七股區七股里", "本里住戶", "臺南市七股區七股里13鄰七股123號"],
-            [2, "臺南市七股區七股里", "跨村里住戶", "臺南市七股區塩埕里6鄰鹽埕237號之3"],
-            [3, "臺南市七股區七股里", "跨區住戶", "臺南市安南區七股116號之19"],
-        ])
+        roster_data = roster_frames["cross_village"]
         
-        with patch('pandas.ExcelFile') as mock_excel_file, \
-             patch('pandas.read_excel') as mock_read_excel:
-            
-            mock_excel_file.return_value.sheet_names = ["七股里"]
-            mock_read_excel.return_value = roster_data
-            
-            data = processor_with_cross_village.read_excel_data("dummy_path.xlsx")
-            
-            # Should process main village address
-            assert len(data) == 1
-            assert data[0]["name"] == "本里住戶"
-            
-            # Should have recorded cross-village address
-            assert hasattr(processor_with_cross_village, 'cross_village_data')
-            assert len(processor_with_cross_village.cross_village_data) == 1
-            assert processor_with_cross_village.cross_village_data[0]["name"] == "跨村里住戶"
-            assert processor_with_cross_village.cross_village_data[0]["standardized_address"] == "塩埕里鹽埕237號之3"
-            
-            # Should have recorded invalid (cross-district) address
-            assert hasattr(processor_with_cross_village, 'invalid_addresses')
-            assert len(processor_with_cross_village.invalid_addresses) == 1
-            assert processor_with_cross_village.invalid_addresses[0]["name"] == "跨區住戶"
+        mock_excel_file, mock_read_excel = pandas_excel_mocks
+        
+        mock_excel_file.return_value.sheet_names = ["七股里"]
+        mock_read_excel.return_value = roster_data
+        
+        data = processor_with_cross_village.read_excel_data("dummy_path.xlsx")
+        
+        # Should process main village address
+        assert len(data) == 1
+        assert data[0]["name"] == "本里住戶"
+        
+        # Should have recorded cross-village address
+        assert hasattr(processor_with_cross_village, 'cross_village_data')
+        assert len(processor_with_cross_village.cross_village_data) == 1
+        assert processor_with_cross_village.cross_village_data[0]["name"] == "跨村里住戶"
+        assert processor_with_cross_village.cross_village_data[0]["standardized_address"] == "塩埕里鹽埕237號之3"
+        
+        # Should have recorded invalid (cross-district) address
+        assert hasattr(processor_with_cross_village, 'invalid_addresses')
+        assert len(processor_with_cross_village.invalid_addresses) == 1
+        assert processor_with_cross_village.invalid_addresses[0]["name"] == "跨區住戶"
     
-    def test_cross_village_address_detection_disabled(self, processor_without_cross_village):
+    def test_cross_village_address_detection_disabled(self, roster_frames, processor_without_cross_village, pandas_excel_mocks):
         """Test cross-village address detection when disabled (default behavior)"""
         # Mock roster data with cross-village addresses
-        roster_data = pd.DataFrame([
-            ["臺南市七股區七股里 名冊", None, None, None],
-            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
-            [None, None, None, None],
-            [1, "臺南市七股區七股里", "本里住戶", "臺南市七股區七股里13鄰七股123號"],
-            [2, "臺南市七股區七股里", "跨村里住戶", "臺南市七股區塩埕里6鄰鹽埕237號之3"],
-        ])
+        roster_data = roster_frames["cross_village_only"]
         
-        with patch('pandas.ExcelFile') as mock_excel_file, \
-             patch('pandas.read_excel') as mock_read_excel:
-            
-            mock_excel_file.return_value.sheet_names = ["七股里"]
-            mock_read_excel.return_value = roster_data
-            
-            data = processor_without_cross_village.read_excel_data("dummy_path.xlsx")
-            
-            # Should process main village address
-            assert len(data) == 1
-            assert data[0]["name"] == "本里住戶"
-            
-            # Should NOT have recorded cross-village address (treated as invalid)
-            assert not hasattr(processor_without_cross_village, 'cross_village_data') or not processor_without_cross_village.cross_village_data
-            
-            # Should have recorded cross-village address as invalid
-            assert hasattr(processor_without_cross_village, 'invalid_addresses')
-            assert len(processor_without_cross_village.invalid_addresses) == 1
-            assert processor_without_cross_village.invalid_addresses[0]["name"] == "跨村里住戶"
-            assert processor_without_cross_village.invalid_addresses[0]["reason"] == "非七股區地址"
+        mock_excel_file, mock_read_excel = pandas_excel_mocks
+        
+        mock_excel_file.return_value.sheet_names = ["七股里"]
+        mock_read_excel.return_value = roster_data
+        
+        data = processor_without_cross_village.read_excel_data("dummy_path.xlsx")
+        
+        # Should process main village address
+        assert len(data) == 1
+        assert data[0]["name"] == "本里住戶"
+        
+        # Should NOT have recorded cross-village address (treated as invalid)
+        assert not hasattr(processor_without_cross_village, 'cross_village_data') or not processor_without_cross_village.cross_village_data
+        
+        # Should have recorded cross-village address as invalid
+        assert hasattr(processor_without_cross_village, 'invalid_addresses')
+        assert len(processor_without_cross_village.invalid_addresses) == 1
+        assert processor_without_cross_village.invalid_addresses[0]["name"] == "跨村里住戶"
+        assert processor_without_cross_village.invalid_addresses[0]["reason"] == "非七股區地址"
     
     def test_standardize_cross_village_address(self, processor_with_cross_village):
         """Test cross-village address standardization"""
@@ -662,13 +714,10 @@ class TestCrossVillageProcessing:
             result = processor_with_cross_village._extract_village_name(input_addr)
             assert result == expected, f"Failed for {input_addr}: got {result}, expected {expected}"
     
-    def test_query_address_coordinates_with_target_village(self, processor_with_cross_village):
+    def test_query_address_coordinates_with_target_village(self, processor_with_cross_village, supabase_chain):
         """Test coordinate query with target village parameter"""
         # Mock successful response for cross-village query
-        mock_data = [{"x_coord": 120.123456, "y_coord": 23.654321}]
-        mock_response = Mock()
-        mock_response.data = mock_data
-        processor_with_cross_village.supabase.table.return_value.select.return_value.eq.return_value.eq.return_value.eq.return_value.execute.return_value = mock_response
+        supabase_chain([{"x_coord": 120.123456, "y_coord": 23.654321}])
         
         result = processor_with_cross_village.query_address_coordinates("鹽埕237號之3", "塩埕里")
         
@@ -678,19 +727,10 @@ class TestCrossVillageProcessing:
         processor_with_cross_village.supabase.table.assert_called_with("addresses")
         processor_with_cross_village.supabase.table.return_value.select.assert_called_with("x_coord, y_coord")
     
-    def test_process_data_with_cross_village_enabled(self, processor_with_cross_village):
+    def test_process_data_with_cross_village_enabled(self, processor_with_cross_village, cross_village_sample):
         """Test complete data processing workflow with cross-village enabled"""
         # Mock cross-village data
-        processor_with_cross_village.cross_village_data = [
-            {
-                "serial_number": "2",
-                "name": "跨村里住戶",
-                "original_address": "臺南市七股區塩埕里6鄰鹽埕237號之3",
-                "standardized_address": "塩埕里鹽埕237號之3",
-                "neighborhood": 6,
-                "sheet_name": "七股里"
-            }
-        ]
+        processor_with_cross_village.cross_village_data = list(cross_village_sample)
         
         # Mock main village data
         main_data = [
@@ -702,12 +742,13 @@ class TestCrossVillageProcessing:
             }
         ]
         
+        coordinates = {
+            ("七股123號", "七股里"): (120.130496, 23.135225),
+            ("塩埕里鹽埕237號之3", "塩埕里"): (120.123456, 23.654321),
+        }
+
         def mock_query_coordinates(address, target_village=None):
-            if address == "七股123號" and (target_village is None or target_village == "七股里"):
-                return (120.130496, 23.135225)
-            elif address == "塩埕里鹽埕237號之3" and target_village == "塩埕里":
-                return (120.123456, 23.654321)
-            return None
+            return coordinates.get((address, target_village or "七股里"))
         
         with patch.object(processor_with_cross_village, 'read_excel_data', return_value=main_data), \
              patch.object(processor_with_cross_village, 'query_address_coordinates', side_effect=mock_query_coordinates), \
@@ -730,135 +771,37 @@ class TestCrossVillageProcessing:
             # No unmatched addresses in this test
             assert len(unmatched) == 0
     
-    def test_export_cross_village_addresses(self, processor_with_cross_village):
-        """Test cross-village addresses export functionality"""
-        cross_village_data = [
-            {
-                "serial_number": "2",
-                "name": "跨村里住戶1",
-                "full_address": "塩埕里鹽埕237號之3",
-                "district": "七股區",
-                "village": "塩埕里",
-                "neighborhood": 6,
-                "longitude": 120.123456,
-                "latitude": 23.654321,
-            },
-            {
-                "serial_number": "3",
-                "name": "跨村里住戶2",
-                "full_address": "樹林里樹林45號",
-                "district": "七股區",
-                "village": "樹林里",
-                "neighborhood": 5,
-                "longitude": None,
-                "latitude": None,
-            }
-        ]
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-        
-        try:
-            processor_with_cross_village.export_cross_village_addresses(cross_village_data, tmp_path)
-            
-            # Verify file was created
-            assert os.path.exists(tmp_path)
-            
-            # Read and verify content
-            df = pd.read_csv(tmp_path, encoding='utf-8-sig')
-            assert len(df) == 2
-            assert list(df.columns) == ["序號", "姓名", "完整地址", "區域", "村里", "鄰別", "經度", "緯度"]
-            
-            # Check first row (with coordinates)
-            assert df.iloc[0]["序號"] == 2
-            assert df.iloc[0]["姓名"] == "跨村里住戶1"
-            assert df.iloc[0]["村里"] == "塩埕里"
-            assert df.iloc[0]["經度"] == 120.123456
-            
-            # Check second row (without coordinates)
-            assert df.iloc[1]["序號"] == 3
-            assert df.iloc[1]["姓名"] == "跨村里住戶2"
-            assert df.iloc[1]["村里"] == "樹林里"
-            assert pd.isna(df.iloc[1]["經度"])
-            
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-    
-    def test_export_cross_village_addresses_empty(self, processor_with_cross_village):
-        """Test cross-village addresses export with empty data"""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-        
-        try:
-            processor_with_cross_village.export_cross_village_addresses([], tmp_path)
-            
-            # Should not create file for empty data
-            # (based on the implementation that skips export when no cross-village addresses)
-            
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-    
-    def test_roster_format_with_variable_columns(self, processor_with_cross_village):
+    def test_roster_format_with_variable_columns(self, processor_with_cross_village, excel_workbooks):
         """Test roster format handling with different column counts"""
         # Test with 6 columns (like 十份里 data)
-        roster_data_6_cols = pd.DataFrame([
-            ["臺南市七股區十份里 名冊", None, None, None, None, None],
-            ["編號", "鄉鎮市區村里", "姓名", "通訊地址", "額外欄1", "額外欄2"],
-            [None, None, None, None, None, None],
-            [1, "臺南市七股區十份里", "測試住戶", "臺南市七股區十份里17鄰十份36號之28", "extra1", "extra2"],
-        ])
+        # Should handle 6 columns by using only first 4
+        data = processor_with_cross_village.read_excel_data(io.BytesIO(excel_workbooks["six_columns"]))
         
-        with patch('pandas.ExcelFile') as mock_excel_file, \
-             patch('pandas.read_excel') as mock_read_excel:
-            
-            mock_excel_file.return_value.sheet_names = ["十份里"]
-            mock_read_excel.return_value = roster_data_6_cols
-            
-            # Should handle 6 columns by using only first 4
-            data = processor_with_cross_village.read_excel_data("dummy_path.xlsx")
-            
-            # Should still extract data correctly
-            assert len(data) == 0  # No valid data for 七股里 processor looking at 十份里 data
-            assert hasattr(processor_with_cross_village, 'cross_village_data')
-            assert len(processor_with_cross_village.cross_village_data) == 1
-            assert processor_with_cross_village.cross_village_data[0]["name"] == "測試住戶"
+        # Should still extract data correctly
+        assert len(data) == 0  # No valid data for 七股里 processor looking at 十份里 data
+        assert hasattr(processor_with_cross_village, 'cross_village_data')
+        assert len(processor_with_cross_village.cross_village_data) == 1
+        assert processor_with_cross_village.cross_village_data[0]["name"] == "測試住戶"
     
-    def test_comprehensive_cross_village_workflow(self, processor_with_cross_village):
+    def test_comprehensive_cross_village_workflow(self, processor_with_cross_village, excel_workbooks):
         """Test complete cross-village workflow with real data patterns"""
-        # Mock comprehensive roster data (similar to real 七股里 data)
-        roster_data = pd.DataFrame([
-            ["臺南市七股區七股里 名冊", None, None, None],
-            ["編號", "鄉鎮市區村里", "姓名", "通訊地址"],
-            [None, None, None, None],
-            [26, "臺南市七股區七股里", "曾榮裕", "臺南市七股區七股里2鄰七股22號之4"],
-            [30, "臺南市七股區七股里", "黃文騫", "臺南市七股區塩埕里6鄰鹽埕237號之3"],  # Cross-village
-            [33, "臺南市七股區七股里", "黃明通", "臺南市七股區七股里7鄰5-2號"],  # Incomplete address
-            [34, "臺南市七股區七股里", "吳國民", "臺南市七股區七股116號之19"],  # Incomplete address
-        ])
-        
+        # Comprehensive roster workbook (similar to real 七股里 data)
+        excel_file = io.BytesIO(excel_workbooks["cross_village_workflow"])
+        
+        # Incomplete addresses (5號之2, 七股116號之19) are intentionally absent
+        coordinates = {
+            ("七股22號之4", "七股里"): (120.130981, 23.132992),
+            ("塩埕里鹽埕237號之3", "塩埕里"): (120.123456, 23.654321),
+        }
+
         def mock_query_coordinates(address, target_village=None):
             """Mock coordinate query with realistic responses"""
-            if address == "七股22號之4" and (target_village is None or target_village == "七股里"):
-                return (120.130981, 23.132992)
-            elif address == "塩埕里鹽埕237號之3" and target_village == "塩埕里":
-                return (120.123456, 23.654321)
-            elif address == "5號之2":  # Incomplete address
-                return None
-            elif address == "七股116號之19":  # Incomplete address  
-                return None
-            return None
-        
-        with patch('pandas.ExcelFile') as mock_excel_file, \
-             patch('pandas.read_excel') as mock_read_excel, \
-             patch.object(processor_with_cross_village, 'query_address_coordinates', side_effect=mock_query_coordinates):
-            
-            mock_excel_file.return_value.sheet_names = ["七股里"]
-            mock_read_excel.return_value = roster_data
+            return coordinates.get((address, target_village or "七股里"))
+        
+        with patch.object(processor_with_cross_village, 'query_address_coordinates', side_effect=mock_query_coordinates):
             
             # Process the data
-            processed_data, unmatched, cross_village = processor_with_cross_village.process_data("dummy_path.xlsx")
+            processed_data, unmatched, cross_village = processor_with_cross_village.process_data(excel_file)
             
             # Verify main village results
             assert len(processed_data) == 2  # 1 valid + 1 unmatched main village addresses
@@ -3,11 +3,13 @@
 測試地圖視覺化、顏色配置等功能。
 """
 
+import gzip
 import pytest
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 from src.survey_grouping.visualizers.color_schemes import ColorScheme
 from src.survey_grouping.visualizers.map_visualizer import MapVisualizer
+from src.survey_grouping.visualizers import folium_renderer
 from src.survey_grouping.visualizers.folium_renderer import FoliumRenderer
 from src.survey_grouping.exporters.map_exporter import MapExporter
 from src.survey_grouping.models.group import RouteGroup
@@ -85,26 +87,10 @@ class TestMapVisualizer:
         visualizer = MapVisualizer()
         assert visualizer.renderer is not None
 
-    def test_get_map_summary(self, sample_addresses):
+    def test_get_map_summary(self, sample_groups):
         """測試取得地圖摘要"""
-        
-        groups = [
-            RouteGroup(
-                group_id="G001",
-                addresses=sample_addresses[:3],
-                estimated_distance=500.0,
-                estimated_time=30,
-            ),
-            RouteGroup(
-                group_id="G002", 
-                addresses=sample_addresses[3:],
-                estimated_distance=300.0,
-                estimated_time=20,
-            )
-        ]
-        
         visualizer = MapVisualizer()
-        summary = visualizer.get_map_summary(groups)
+        summary = visualizer.get_map_summary(list(sample_groups))
         
         assert "total_groups" in summary
         assert "total_addresses" in summary
@@ -116,10 +102,49 @@ class TestMapVisualizer:
         assert "group_details" in summary
         
         assert summary["total_groups"] == 2
-        assert summary["total_addresses"] == len(sample_addresses)
+        assert summary["total_addresses"] == 5
         assert summary["total_distance"] == 800.0
         assert summary["total_time"] == 50
 
+    def test_create_group_maps_skips_failed_group(self, sample_groups, tmp_path):
+        """測試單一分組地圖失敗時，其餘分組仍會輸出"""
+        visualizer = MapVisualizer()
+        visualizer.renderer = Mock()
+        map_obj = Mock()
+        map_obj.get_root.return_value.render.return_value = "<html></html>"
+        visualizer.renderer.create_group_map.side_effect = [
+            RuntimeError("渲染失敗"),
+            map_obj,
+        ]
+
+        files = visualizer.create_group_maps(
+            list(sample_groups), "安南區", "安慶里", str(tmp_path)
+        )
+
+        assert files == [str(tmp_path / "安南區安慶里_第2組.html")]
+        assert Path(files[0]).read_text(encoding="utf-8") == "<html></html>"
+
+    def test_create_all_maps_compressed(self, sample_groups, tmp_path):
+        """測試壓縮輸出時回傳 .gz 路徑，且內容可解壓讀回"""
+        visualizer = MapVisualizer()
+        visualizer.renderer = Mock()
+        map_obj = Mock()
+        map_obj.get_root.return_value.render.return_value = "<html>地圖</html>"
+        visualizer.renderer.create_overview_map.return_value = map_obj
+        visualizer.renderer.create_group_map.return_value = map_obj
+
+        result = visualizer.create_all_maps(
+            list(sample_groups), "安南區", "安慶里", str(tmp_path), compress=True
+        )
+
+        assert result["errors"] == []
+        assert result["overview_map"] == str(tmp_path / "安南區安慶里_總覽.html.gz")
+        assert len(result["group_maps"]) == 2
+        for file_path in [result["overview_map"], *result["group_maps"]]:
+            assert file_path.endswith(".html.gz")
+            with gzip.open(file_path, "rt", encoding="utf-8") as f:
+                assert f.read() == "<html>地圖</html>"
+
 
 class TestFoliumRenderer:
     """Folium 渲染器測試"""
@@ -129,32 +154,41 @@ class TestFoliumRenderer:
         renderer = FoliumRenderer()
         assert renderer.color_scheme is not None
 
-    def test_calculate_center(self, sample_addresses):
+    def test_calculate_center(self, sample_groups):
         """測試計算中心點"""
-        
-        groups = [RouteGroup(group_id="G001", addresses=sample_addresses)]
         renderer = FoliumRenderer()
         
-        center = renderer._calculate_center(groups)
+        center = renderer._calculate_center(list(sample_groups))
         
         assert isinstance(center, tuple)
         assert len(center) == 2
         assert isinstance(center[0], float)
         assert isinstance(center[1], float)
 
-    def test_calculate_group_center(self, sample_addresses):
+    def test_calculate_group_center(self, sample_groups):
         """測試計算分組中心點"""
-        
-        group = RouteGroup(group_id="G001", addresses=sample_addresses[:3])
         renderer = FoliumRenderer()
         
-        center = renderer._calculate_group_center(group)
+        center = renderer._calculate_group_center(sample_groups[0])
         
         assert isinstance(center, tuple)
         assert len(center) == 2
         assert isinstance(center[0], float)
         assert isinstance(center[1], float)
 
+    def test_marker_zoom_toggle_disables_hidden_markers(self):
+        """測試低縮放層級隱藏標記時，同時停用點擊與提示"""
+        m = folium_renderer._load_folium().Map()
+        toggle_class = folium_renderer._marker_zoom_toggle_class()
+        toggle_class(folium_renderer.MARKER_MIN_ZOOM).add_to(m)
+
+        html = m.get_root().render()
+
+        assert f"map.getZoom() >= {folium_renderer.MARKER_MIN_ZOOM}" in html
+        assert "layer.options.interactive = visible;" in html
+        assert 'el.style.pointerEvents = visible ? "" : "none";' in html
+        assert "layer.closePopup();" in html
+
 
 class TestMapExporter:
     """地圖匯出器測試"""
@@ -164,20 +198,10 @@ class TestMapExporter:
         exporter = MapExporter()
         assert exporter.visualizer is not None
 
-    def test_get_export_summary(self, sample_addresses):
+    def test_get_export_summary(self, sample_groups):
         """測試取得匯出摘要"""
-        
-        groups = [
-            RouteGroup(
-                group_id="G001",
-                addresses=sample_addresses[:3],
-                estimated_distance=500.0,
-                estimated_time=30,
-            )
-        ]
-        
         exporter = MapExporter()
-        summary = exporter.get_export_summary(groups)
+        summary = exporter.get_export_summary([sample_groups[0]])
         
         assert "total_groups" in summary
         assert "total_addresses" in summary
@@ -196,22 +220,11 @@ class TestVisualizationIntegration:
         
         assert color1 == color2
 
-    def test_visualization_pipeline(self, sample_addresses, tmp_path):
+    def test_visualization_pipeline(self, sample_groups):
         """測試視覺化流程"""
-        
-        # 建立測試分組
-        groups = [
-            RouteGroup(
-                group_id="G001",
-                addresses=sample_addresses[:3],
-                estimated_distance=500.0,
-                estimated_time=30,
-            )
-        ]
-        
         # 測試地圖視覺化器
         visualizer = MapVisualizer()
-        summary = visualizer.get_map_summary(groups)
+        summary = visualizer.get_map_summary([sample_groups[0]])
         
         assert summary["total_groups"] == 1
         assert summary["total_addresses"] == 3
@@ -251,153 +264,169 @@ class TestVisualizationIntegration:
 
 
 # 新增的 CSV 導入和視覺化邏輯測試
+@pytest.fixture(scope="module")
+def addresses_with_coords():
+    """提供有座標的地址資料（同一模組的測試共用，測試只能讀取）"""
+    return [
+        Address(
+            id=1, district='七股區', village='西寮里', neighborhood=1,
+            full_address='西寮1號', x_coord=120.096955, y_coord=23.169737
+        ),
+        Address(
+            id=2, district='七股區', village='西寮里', neighborhood=1,
+            full_address='西寮2號', x_coord=120.096739, y_coord=23.169929
+        )
+    ]
+
+
+@pytest.fixture(scope="module")
+def group_with_route_order(addresses_with_coords):
+    """有訪問順序的分組"""
+    return RouteGroup(
+        group_id='七股區西寮里-01',
+        addresses=addresses_with_coords,
+        route_order=[1, 2],  # 有順序
+        estimated_distance=500.0,
+        estimated_time=30
+    )
+
+
+@pytest.fixture(scope="module")
+def group_without_route_order(addresses_with_coords):
+    """沒有訪問順序的分組"""
+    return RouteGroup(
+        group_id='七股區西寮里-02',
+        addresses=addresses_with_coords,
+        route_order=[],  # 空的順序
+        estimated_distance=None,
+        estimated_time=None
+    )
+
+
 class TestFoliumRendererCSVSupport:
     """測試 Folium 渲染器對 CSV 導入的支援"""
     
     @pytest.fixture
-    def addresses_with_coords(self):
-        """提供有座標的地址資料"""
-        return [
-            Address(
-                id=1, district='七股區', village='西寮里', neighborhood=1,
-                full_address='西寮1號', x_coord=120.096955, y_coord=23.169737
-            ),
-            Address(
-                id=2, district='七股區', village='西寮里', neighborhood=1,
-                full_address='西寮2號', x_coord=120.096739, y_coord=23.169929
-            )
-        ]
-    
-    @pytest.fixture
-    def group_with_route_order(self, addresses_with_coords):
-        """有訪問順序的分組"""
-        return RouteGroup(
-            group_id='七股區西寮里-01',
-            addresses=addresses_with_coords,
-            route_order=[1, 2],  # 有順序
-            estimated_distance=500.0,
-            estimated_time=30
-        )
-    
+    def mock_folium(self, monkeypatch):
+        """以 Mock 取代渲染器延遲載入的 folium"""
+        mock = Mock()
+        monkeypatch.setattr(folium_renderer, "_load_folium", lambda: mock)
+        return mock
+
     @pytest.fixture
-    def group_without_route_order(self, addresses_with_coords):
-        """沒有訪問順序的分組"""
-        return RouteGroup(
-            group_id='七股區西寮里-02',
-            addresses=addresses_with_coords,
-            route_order=[],  # 空的順序
-            estimated_distance=None,
-            estimated_time=None
-        )
-    
-    def test_add_route_line_with_order(self, group_with_route_order):
+    def mock_plugins(self, mock_folium):
+        """取代 folium 後對應的 folium.plugins"""
+        return mock_folium.plugins
+
+    def test_add_route_lines_with_order(self, group_with_route_order, mock_folium):
         """測試有順序時添加路線"""
         renderer = FoliumRenderer()
-        mock_feature_group = Mock()
-        
-        with patch('src.survey_grouping.visualizers.folium_renderer.folium') as mock_folium:
-            mock_polyline = Mock()
-            mock_folium.PolyLine.return_value = mock_polyline
-            
-            renderer._add_route_line(mock_feature_group, group_with_route_order, 0)
-            
-            # 檢查有建立路線
-            mock_folium.PolyLine.assert_called_once()
-            mock_polyline.add_to.assert_called_once_with(mock_feature_group)
+        mock_map = Mock()
+        
+        renderer._add_route_lines(mock_map, [group_with_route_order])
+        
+        # 檢查以 GeoJSON 建立一條路線，座標為 (lng, lat)
+        mock_folium.GeoJson.assert_called_once()
+        features = mock_folium.GeoJson.call_args.args[0]["features"]
+        assert len(features) == 1
+        assert features[0]["geometry"]["coordinates"] == [
+            [120.096955, 23.169737],
+            [120.096739, 23.169929],
+        ]
+        mock_map.add_child.assert_called_once_with(
+            mock_folium.FeatureGroup.return_value
+        )
     
-    def test_add_route_line_without_order(self, group_without_route_order):
+    def test_add_route_lines_without_order(
+        self, group_without_route_order, mock_folium
+    ):
         """測試沒有順序時不添加路線"""
         renderer = FoliumRenderer()
-        mock_feature_group = Mock()
+        mock_map = Mock()
         
-        with patch('src.survey_grouping.visualizers.folium_renderer.folium') as mock_folium:
-            renderer._add_route_line(mock_feature_group, group_without_route_order, 0)
-            
-            # 檢查沒有建立路線
-            mock_folium.PolyLine.assert_not_called()
+        renderer._add_route_lines(mock_map, [group_without_route_order])
+        
+        # 檢查沒有建立路線圖層
+        mock_folium.GeoJson.assert_not_called()
+        mock_map.add_child.assert_not_called()
     
-    def test_add_detailed_route_with_order(self, group_with_route_order):
+    def test_add_detailed_route_with_order(
+        self, group_with_route_order, mock_folium, mock_plugins
+    ):
         """測試有順序時添加詳細路線"""
         renderer = FoliumRenderer()
         mock_map = Mock()
         
-        with patch('src.survey_grouping.visualizers.folium_renderer.folium') as mock_folium:
-            with patch('src.survey_grouping.visualizers.folium_renderer.plugins') as mock_plugins:
-                renderer._add_detailed_route(mock_map, group_with_route_order, 0)
-                
-                # 檢查有建立路線和箭頭
-                mock_folium.PolyLine.assert_called()
-                mock_plugins.PolyLineTextPath.assert_called()
+        renderer._add_detailed_route(mock_map, group_with_route_order, 0)
+        
+        # 檢查有建立路線和箭頭
+        mock_folium.PolyLine.assert_called()
+        mock_plugins.PolyLineTextPath.assert_called()
     
-    def test_add_detailed_route_without_order(self, group_without_route_order):
+    def test_add_detailed_route_without_order(
+        self, group_without_route_order, mock_folium, mock_plugins
+    ):
         """測試沒有順序時不添加詳細路線"""
         renderer = FoliumRenderer()
         mock_map = Mock()
         
-        with patch('src.survey_grouping.visualizers.folium_renderer.folium') as mock_folium:
-            with patch('src.survey_grouping.visualizers.folium_renderer.plugins') as mock_plugins:
-                renderer._add_detailed_route(mock_map, group_without_route_order, 0)
-                
-                # 檢查沒有建立路線元素
-                mock_folium.PolyLine.assert_not_called()
-                mock_plugins.PolyLineTextPath.assert_not_called()
+        renderer._add_detailed_route(mock_map, group_without_route_order, 0)
+        
+        # 檢查沒有建立路線元素
+        mock_folium.PolyLine.assert_not_called()
+        mock_plugins.PolyLineTextPath.assert_not_called()
     
-    def test_add_ordered_markers_with_order(self, group_with_route_order):
+    def test_add_ordered_markers_with_order(self, group_with_route_order, mock_folium):
         """測試有順序時添加順序標記"""
         renderer = FoliumRenderer()
         mock_map = Mock()
+        mock_marker = Mock()
+        mock_folium.Marker.return_value = mock_marker
+        
+        renderer._add_ordered_markers(mock_map, group_with_route_order, 0)
         
-        with patch('src.survey_grouping.visualizers.folium_renderer.folium') as mock_folium:
-            mock_marker = Mock()
-            mock_folium.Marker.return_value = mock_marker
-            mock_folium.DivIcon.return_value = Mock()
-            mock_folium.Popup.return_value = Mock()
-            
-            renderer._add_ordered_markers(mock_map, group_with_route_order, 0)
-            
-            # 檢查使用 DivIcon（順序編號標記）
-            mock_folium.DivIcon.assert_called()
-            assert mock_marker.add_to.call_count == 2
+        # 檢查使用 DivIcon（順序編號標記）
+        mock_folium.DivIcon.assert_called()
+        assert mock_marker.add_to.call_count == 2
     
-    def test_add_ordered_markers_without_order(self, group_without_route_order):
+    def test_add_ordered_markers_without_order(
+        self, group_without_route_order, mock_folium
+    ):
         """測試沒有順序時添加一般標記"""
         renderer = FoliumRenderer()
         mock_map = Mock()
+        mock_marker = Mock()
+        mock_folium.CircleMarker.return_value = mock_marker
         
-        with patch('src.survey_grouping.visualizers.folium_renderer.folium') as mock_folium:
-            mock_marker = Mock()
-            mock_folium.Marker.return_value = mock_marker
-            mock_folium.Icon.return_value = Mock()
-            mock_folium.Popup.return_value = Mock()
-            
-            renderer._add_ordered_markers(mock_map, group_without_route_order, 0)
-            
-            # 檢查使用一般 Icon（不是 DivIcon）
-            mock_folium.Icon.assert_called()
-            mock_folium.DivIcon.assert_not_called()
-            assert mock_marker.add_to.call_count == 2
+        renderer._add_ordered_markers(mock_map, group_without_route_order, 0)
+        
+        # 檢查使用 CircleMarker（不是 DivIcon 或圖示標記）
+        mock_folium.CircleMarker.assert_called()
+        mock_folium.DivIcon.assert_not_called()
+        mock_folium.Icon.assert_not_called()
+        assert mock_marker.add_to.call_count == 2
     
-    def test_visualization_logic_consistency(self, group_with_route_order, group_without_route_order):
+    @pytest.mark.usefixtures("mock_plugins")
+    def test_visualization_logic_consistency(
+        self,
+        group_with_route_order,
+        group_without_route_order,
+        mock_folium,
+    ):
         """測試視覺化邏輯的一致性"""
         renderer = FoliumRenderer()
         
-        # 測試有順序的分組
-        with patch('src.survey_grouping.visualizers.folium_renderer.folium'):
-            mock_fg = Mock()
-            mock_map = Mock()
-            
-            # 應該添加路線
-            renderer._add_route_line(mock_fg, group_with_route_order, 0)
-            renderer._add_detailed_route(mock_map, group_with_route_order, 0)
-        
-        # 測試沒有順序的分組
-        with patch('src.survey_grouping.visualizers.folium_renderer.folium') as mock_folium:
-            mock_fg = Mock()
-            mock_map = Mock()
-            
-            # 不應該添加路線
-            renderer._add_route_line(mock_fg, group_without_route_order, 0)
-            renderer._add_detailed_route(mock_map, group_without_route_order, 0)
-            
-            # 檢查沒有呼叫 PolyLine
-            mock_folium.PolyLine.assert_not_called()
+        # 測試有順序的分組：應該添加路線
+        renderer._add_route_lines(Mock(), [group_with_route_order])
+        renderer._add_detailed_route(Mock(), group_with_route_order, 0)
+        mock_folium.GeoJson.assert_called_once()
+        mock_folium.PolyLine.assert_called_once()
+        
+        # 測試沒有順序的分組：不應該添加路線
+        mock_folium.reset_mock()
+        renderer._add_route_lines(Mock(), [group_without_route_order])
+        renderer._add_detailed_route(Mock(), group_without_route_order, 0)
+        
+        # 檢查沒有呼叫 GeoJson 與 PolyLine
+        mock_folium.GeoJson.assert_not_called()
+        mock_folium.PolyLine.assert_not_called()